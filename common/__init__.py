@@ -0,0 +1 @@
+"""여러 수업 도구 페이지가 함께 사용하는 공용 모듈 모음."""
@@ -0,0 +1,272 @@
+"""
+분석 기록 보관소 (Parquet 컬럼 저장소)
+
+각 페이지에서 나온 분석 결과(인물, 판정, 학생 예측, 소요 시간, 사용한 자료 출처 등)를
+캐시 만료와 상관없이 남겨 두었다가, 기록 보관소 페이지에서 다시 조회할 수 있게 합니다.
+
+- 기록은 메모리 버퍼에 모았다가 일정 개수/시간마다 날짜별 폴더에 작은 Parquet 파일로 씁니다.
+  (data/archive/date=YYYY-MM-DD/part-*.parquet, hive 파티션 구조)
+- 날짜 폴더와 화면에 보이는 시각은 수업이 열리는 한국 시간(KST) 기준입니다. (파일 안의 ts 는 UTC)
+- 조회는 pyarrow dataset 으로 필요한 컬럼/파티션만 배치 단위로 읽기 때문에
+  전체 기록을 한 번에 메모리에 올리지 않습니다.
+"""
+import atexit
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ARCHIVE_DIR = os.environ.get(
+    "HISTORY_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "archive"),
+)
+
+# 날짜 구분과 시각 표시에 쓰는 시간대 (한국 표준시, 일광 절약 시간 없음)
+LOCAL_TZ = timezone(timedelta(hours=9), "KST")
+
+# 버퍼가 이만큼 쌓이거나, 마지막 기록 후 이 시간이 지나면 파일로 내보냅니다.
+FLUSH_MAX_RECORDS = 20
+FLUSH_MAX_SECONDS = 10
+# 하루 폴더에 작은 파일이 이 개수를 넘으면 하나로 합칩니다.
+COMPACT_MIN_PARTS = 32
+
+SCHEMA = pa.schema([
+    ("ts", pa.timestamp("ms", tz="UTC")),
+    ("page", pa.string()),
+    ("figure", pa.string()),
+    ("verdict", pa.string()),
+    ("prediction", pa.string()),
+    ("correct", pa.bool_()),
+    ("latency_ms", pa.float64()),
+    ("source", pa.string()),
+    ("explanation", pa.string()),
+])
+
+_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+_lock = threading.Lock()
+_buffer = []
+_last_flush = time.monotonic()
+
+
+# ---------------------------------------------------------
+# 기록 쓰기
+# ---------------------------------------------------------
+def record_analysis(page, figure, verdict, prediction, latency_ms, source, explanation=""):
+    """분석 한 건을 보관소에 추가합니다. (예측이 없는 페이지는 prediction=None)"""
+    record = {
+        "ts": datetime.now(timezone.utc),
+        "page": page,
+        "figure": figure,
+        "verdict": verdict,
+        "prediction": prediction,
+        "correct": (verdict == prediction) if prediction is not None else None,
+        "latency_ms": float(latency_ms),
+        "source": source,
+        "explanation": explanation,
+    }
+    with _lock:
+        _buffer.append(record)
+        due = (
+            len(_buffer) >= FLUSH_MAX_RECORDS
+            or time.monotonic() - _last_flush >= FLUSH_MAX_SECONDS
+        )
+    if due:
+        flush()
+
+
+def flush():
+    """버퍼에 남은 기록을 날짜별 Parquet 파일로 내보냅니다."""
+    global _buffer, _last_flush
+    with _lock:
+        records, _buffer = _buffer, []
+        _last_flush = time.monotonic()
+        if not records:
+            return
+
+        by_date = {}
+        for record in records:
+            by_date.setdefault(record["ts"].astimezone(LOCAL_TZ).strftime("%Y-%m-%d"), []).append(record)
+
+        for date, rows in by_date.items():
+            date_dir = os.path.join(ARCHIVE_DIR, f"date={date}")
+            os.makedirs(date_dir, exist_ok=True)
+            table = pa.Table.from_pylist(rows, schema=SCHEMA)
+            pq.write_table(table, os.path.join(date_dir, _part_name()))
+            _compact_if_needed(date_dir)
+
+
+def _part_name():
+    # 파일 이름이 시간순으로 정렬되도록 타임스탬프를 앞에 둡니다.
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _compact_if_needed(date_dir):
+    """작은 파일이 너무 많아지면 하나로 합칩니다. (_lock 을 잡은 상태에서 호출)"""
+    parts = sorted(f for f in os.listdir(date_dir) if f.endswith(".parquet"))
+    if len(parts) < COMPACT_MIN_PARTS:
+        return
+    paths = [os.path.join(date_dir, f) for f in parts]
+    merged = pa.concat_tables(pq.read_table(p, schema=SCHEMA) for p in paths)
+    # 합친 파일은 가장 마지막 조각의 이름을 물려받아 시간 순서를 유지합니다.
+    tmp_path = paths[-1] + ".tmp"
+    pq.write_table(merged, tmp_path)
+    for p in paths:
+        os.remove(p)
+    os.replace(tmp_path, paths[-1])
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------
+# 기록 조회
+# ---------------------------------------------------------
+# 조회는 _lock 을 잡은 채로 파일을 읽습니다. (동시에 flush 가 작은 파일을 합치며 지우는 것을 막기 위함)
+def today():
+    """보관소 기준 시간대(KST)의 오늘 날짜"""
+    return datetime.now(LOCAL_TZ).date()
+
+
+def _dataset():
+    if not os.path.isdir(ARCHIVE_DIR):
+        return None
+    return ds.dataset(ARCHIVE_DIR, format="parquet", schema=SCHEMA.append(pa.field("date", pa.string())),
+                      partitioning=_PARTITIONING, exclude_invalid_files=True)
+
+
+def _build_filter(page=None, figure=None, verdict=None, correct=None, start_date=None, end_date=None):
+    """조회 조건을 pyarrow 필터 식으로 바꿉니다. 날짜 조건은 파티션 폴더 단위로 걸러집니다."""
+    expr = None
+
+    def _and(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    if page:
+        _and(ds.field("page") == page)
+    if figure:
+        _and(pc.match_substring(ds.field("figure"), figure))
+    if verdict:
+        _and(ds.field("verdict") == verdict)
+    if correct is not None:
+        _and(ds.field("correct") == correct)
+    if start_date:
+        _and(ds.field("date") >= str(start_date))
+    if end_date:
+        _and(ds.field("date") <= str(end_date))
+    return expr
+
+
+def count(**filters):
+    """조건에 맞는 기록 수를 셉니다."""
+    flush()
+    with _lock:
+        dataset = _dataset()
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=_build_filter(**filters))
+
+
+def query(offset=0, limit=20, columns=None, **filters):
+    """
+    조건에 맞는 기록을 최신순으로 offset 부터 limit 개만 돌려줍니다.
+    파일을 최신 것부터 하나씩 읽으므로 앞쪽 페이지는 오래된 기록을 건드리지 않습니다.
+    """
+    flush()
+    columns = columns or [f.name for f in SCHEMA]
+    chunks = []
+    with _lock:
+        dataset = _dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns)
+
+        expr = _build_filter(**filters)
+        fragments = sorted(dataset.get_fragments(filter=expr), key=lambda f: f.path, reverse=True)
+
+        skip, remaining = offset, limit
+        for fragment in fragments:
+            if remaining <= 0:
+                break
+            table = fragment.to_table(schema=dataset.schema, filter=expr, columns=columns)
+            # 한 파일 안에서는 기록이 시간순으로 쌓여 있으므로 뒤집어서 최신순으로 만듭니다.
+            n = table.num_rows
+            if skip >= n:
+                skip -= n
+                continue
+            stop = n - skip
+            start = max(0, stop - remaining)
+            chunk = table.slice(start, stop - start)
+            chunks.append(chunk.to_pandas().iloc[::-1])
+            remaining -= chunk.num_rows
+            skip = 0
+
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(chunks, ignore_index=True)
+    if "ts" in result:
+        result["ts"] = result["ts"].dt.tz_convert(LOCAL_TZ)
+    return result
+
+
+def aggregate(by="figure", **filters):
+    """
+    by 컬럼(page, figure, verdict, source 등)별로 건수, 정답률, 평균 소요 시간을 집계합니다.
+    배치 단위로 부분 합계를 구한 뒤 합치므로 메모리 사용량이 기록 수에 비례하지 않습니다.
+    """
+    flush()
+    result_columns = [by, "건수", "정답 수", "예측 수", "정답률(%)", "평균 소요(ms)"]
+    partials = []
+    with _lock:
+        dataset = _dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=result_columns)
+        scanner = dataset.scanner(columns=[by, "correct", "latency_ms"], filter=_build_filter(**filters))
+        for batch in scanner.to_batches():
+            if batch.num_rows == 0:
+                continue
+            df = batch.to_pandas()
+            df["predicted"] = df["correct"].notna()
+            df["correct"] = df["correct"].fillna(False).astype(int)
+            partials.append(df.groupby(by, dropna=False).agg(
+                count=("latency_ms", "size"),
+                correct=("correct", "sum"),
+                predicted=("predicted", "sum"),
+                latency_sum=("latency_ms", "sum"),
+            ))
+
+    if not partials:
+        return pd.DataFrame(columns=result_columns)
+
+    total = pd.concat(partials).groupby(level=0, dropna=False).sum()
+    accuracy = (total["correct"] / total["predicted"].where(total["predicted"] > 0) * 100).round(1)
+    out = pd.DataFrame({
+        "건수": total["count"].astype(int),
+        "정답 수": total["correct"].astype(int),
+        "예측 수": total["predicted"].astype(int),
+        "정답률(%)": accuracy,
+        "평균 소요(ms)": (total["latency_sum"] / total["count"]).round(0),
+    })
+    out.index.name = by
+    return out.reset_index().sort_values("건수", ascending=False, ignore_index=True)
+
+
+def distinct(column, **filters):
+    """필터 선택지로 쓸 수 있도록 컬럼의 고유값 목록을 돌려줍니다."""
+    flush()
+    values = set()
+    with _lock:
+        dataset = _dataset()
+        if dataset is None:
+            return []
+        for batch in dataset.to_batches(columns=[column], filter=_build_filter(**filters)):
+            values.update(v for v in batch.column(0).unique().to_pylist() if v is not None)
+    return sorted(values)
@@ -0,0 +1,178 @@
+"""
+Gemini 요청 마이크로 배칭
+
+수업 중 여러 학생이 비슷한 시각에 서로 다른 인물을 분석하면, 인물마다 같은 지시문을 반복한
+generate_content 호출이 따로 나갑니다. MicroBatcher 는 같은 페이지의 요청을 잠시(WINDOW_SECONDS) 모아
+인물별 구역이 나뉜 하나의 프롬프트로 보내고, 응답을 다시 인물별로 잘라 각 요청에 돌려줍니다.
+
+- 최근에 다른 요청이 없던 한가한 때에는 기다리지 않고 바로 보냅니다.
+- 묶은 프롬프트가 너무 길어져 라우터가 상위 모델로 올리지 않도록 글자 수를 제한합니다.
+- 응답에서 자기 구역을 찾지 못했거나 형식이 맞지 않는 요청만 개별 호출로 다시 처리합니다.
+  (묶음 호출 자체가 실패하면 묶인 요청 모두에 그 오류를 돌려줍니다.)
+"""
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from common.model_router import LONG_CONTEXT_CHARS, router
+
+# 요청을 모으는 시간(초)
+WINDOW_SECONDS = 0.3
+# 한 번에 묶는 최대 인물 수
+MAX_BATCH = 5
+# 마지막 요청 후 이 시간(초) 안에 새 요청이 오면 '붐비는 중'으로 보고 모아서 보냅니다.
+BUSY_SECONDS = 2.0
+# 묶은 프롬프트 전체(역할·규칙·형식 안내 포함)의 최대 글자 수 (넘으면 라우터가 상위 모델을 고르므로 그 아래로 유지)
+MAX_PACKED_CHARS = LONG_CONTEXT_CHARS
+
+_SECTION_MARK = re.compile(r"^=+\s*인물\s*(\d+)\s*:[^\n]*$", re.MULTILINE)
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-batch")
+
+
+class _Request:
+    __slots__ = ("name", "section", "prompt", "future")
+
+    def __init__(self, name, section, prompt):
+        self.name = name
+        self.section = section
+        self.prompt = prompt
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    한 페이지의 분석 요청을 모아 보내는 배처.
+
+    role: 묶은 프롬프트 맨 앞에 한 번만 넣는 역할 설명
+    rules: 인물마다 똑같이 적용할 출력 규칙 (묶은 프롬프트에는 한 번만 들어감)
+    validate: 잘라낸 인물별 답변이 올바른 형식인지 확인하는 함수
+    """
+
+    def __init__(self, role, rules, task="classify", validate=None):
+        self.role = role
+        self.rules = rules
+        self.task = task
+        self.validate = validate or (lambda text: bool(text.strip()))
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._last_arrival = float("-inf")
+
+    def generate(self, name, section, prompt):
+        """
+        인물 한 명의 분석 텍스트를 돌려줍니다.
+        section: 묶은 프롬프트에 들어갈 이 인물의 자료 구역, prompt: 혼자 보낼 때 쓰는 전체 프롬프트
+        """
+        request = _Request(name, section, prompt)
+        self._enqueue(request)
+        text = request.future.result()
+        if text is None:
+            # 묶음 응답에서 답을 찾지 못함 → 개별 호출로 다시 요청
+            text = router.generate_content(prompt, task=self.task).text
+        return text
+
+    def _enqueue(self, request):
+        now = time.monotonic()
+        with self._lock:
+            busy = now - self._last_arrival < BUSY_SECONDS
+            self._last_arrival = now
+            # 이 요청을 더하면 묶은 프롬프트가 너무 길어질 때는 지금까지 모인 것부터 보냅니다.
+            if self._pending and len(self._pack(self._pending + [request])) > MAX_PACKED_CHARS:
+                self._flush_locked()
+
+            self._pending.append(request)
+            if not busy or len(self._pending) >= MAX_BATCH:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(WINDOW_SECONDS, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            _executor.submit(self._send, batch)
+
+    def _send(self, batch):
+        if len(batch) == 1:
+            request = batch[0]
+            try:
+                request.future.set_result(router.generate_content(request.prompt, task=self.task).text)
+            except Exception as e:
+                request.future.set_exception(e)
+            return
+
+        try:
+            text = router.generate_content(self._pack(batch), task=self.task).text
+        except Exception as e:
+            # 라우터가 모든 모델을 시도하고도 실패했다면(429, 장애 등) 개별 호출도 같은 이유로 실패하므로
+            # 요청마다 다시 시도하지 않고 같은 오류를 돌려줍니다.
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        answers = self._split(text)
+        for number, request in enumerate(batch, start=1):
+            answer = answers.get(number)
+            if answer is not None and not self.validate(answer):
+                answer = None
+            request.future.set_result(answer)
+
+    def _pack(self, batch):
+        sections = "\n\n".join(
+            f"### 인물 {number}: {request.name}\n{request.section}"
+            for number, request in enumerate(batch, start=1)
+        )
+        return f"""
+    {self.role}
+    아래 {len(batch)}명의 인물을 각각 따로 분석하세요.
+
+    [인물마다 똑같이 적용할 출력 규칙]
+    {self.rules}
+
+    [인물별 자료]
+    {sections}
+
+    [답변 형식 - 반드시 지킬 것]
+    - 인물마다 "===== 인물 번호: 이름 =====" 한 줄(예: ===== 인물 1: {batch[0].name} =====)로 시작하고,
+      바로 다음 줄부터 위 출력 규칙을 그대로 지켜 그 인물에 대한 답만 작성하세요.
+    - 인물 번호와 순서를 바꾸거나 빠뜨리지 마세요.
+    """
+
+    @staticmethod
+    def _split(text):
+        """묶음 응답을 {인물 번호: 답변} 으로 자릅니다."""
+        marks = list(_SECTION_MARK.finditer(text))
+        answers = {}
+        for i, mark in enumerate(marks):
+            end = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+            answers.setdefault(int(mark.group(1)), text[mark.end():end].strip())
+        return answers
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(page, role, rules, task="classify", validate=None):
+    """
+    페이지별 배처를 돌려줍니다. 페이지 스크립트는 매번 다시 실행되므로
+    같은 page 이름에는 같은 배처를 쓰고 설정만 최신 값으로 바꿉니다.
+    """
+    with _batchers_lock:
+        batcher = _batchers.get(page)
+        if batcher is None:
+            batcher = _batchers[page] = MicroBatcher(role, rules, task, validate)
+        else:
+            batcher.role, batcher.rules, batcher.task = role, rules, task
+            if validate is not None:
+                batcher.validate = validate
+        return batcher
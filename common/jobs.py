@@ -0,0 +1,234 @@
+"""
+백그라운드 분석 작업 관리
+
+분석을 Streamlit 스크립트 스레드에서 바로 실행하면, 학생이 분석 도중 예측을 바꾸거나 글자를 입력해
+스크립트가 다시 실행(rerun)될 때 진행 중이던 작업이 버려지고 같은 Gemini 호출을 또 하게 됩니다.
+여기서는 분석을 작업 큐(스레드 풀)에 맡기고, 페이지는 session_state 에 작업 id 만 저장한 뒤
+다시 실행될 때마다 기다리지 않고 상태만 확인합니다. 끝난 결과는 일정 시간 보관되므로
+다시 실행되거나 다른 학생이 같은 인물을 요청해도 이미 비용을 낸 결과를 그대로 씁니다.
+
+분석 페이지들은 submit_analysis / analysis_result 로 작업 등록, 대기/오류/결과 분기, 보관소 기록을 함께 씁니다.
+보관소 기록은 결과 화면이 아니라 작업이 끝나는 시점에 작업 스레드에서 남기므로,
+학생이 결과를 보기 전에 페이지를 떠나도 비용을 낸 분석은 기록됩니다.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from common import archive, profiling
+from common.sources import NO_SOURCE
+
+# 동시에 실행하는 분석 작업 수
+MAX_WORKERS = 8
+# 끝난 작업 결과를 보관하는 시간(초)과 최대 개수
+KEEP_SECONDS = 6 * 3600
+MAX_FINISHED = 2000
+# 진행 중인 작업을 확인하는 간격(초)
+POLL_SECONDS = 0.5
+# 작업을 맡긴 뒤 바로 기다려 보는 시간(초). 캐시된 결과라면 이 안에 끝나 대기 화면 없이 결과를 보여 줍니다.
+INSTANT_SECONDS = 0.2
+
+
+class Job:
+    """작업 하나의 상태 (pending → done / error)"""
+
+    def __init__(self, job_id, key):
+        self.id = job_id
+        self.key = key
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        # 작업이 성공하면 (결과, 실행 시간 ms) 로 호출할 함수들 (같은 작업을 함께 기다리는 요청마다 하나씩)
+        self.callbacks = []
+        self.finished_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.status != "pending"
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.submitted
+
+
+class JobRunner:
+    """작업 큐 + 로컬 작업 스레드 풀"""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._jobs = {}          # job id → Job
+        self._active = {}        # key → 진행 중인 job id
+
+    def submit(self, key, fn, *args, on_done=None):
+        """
+        fn(*args) 를 작업으로 등록하고 작업 id 를 돌려줍니다.
+        같은 key 의 작업이 이미 진행 중이면 새로 만들지 않고 그 작업 id 를 돌려줍니다.
+        on_done(result, latency_ms) 는 작업이 성공하면 작업 스레드에서 호출됩니다. (이미 진행 중인 작업에 붙어도 호출)
+        """
+        with self._lock:
+            active_id = self._active.get(key)
+            if active_id is not None:
+                if on_done is not None:
+                    self._jobs[active_id].callbacks.append(on_done)
+                return active_id
+            job = Job(uuid.uuid4().hex, key)
+            if on_done is not None:
+                job.callbacks.append(on_done)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+            self._prune_locked()
+        # 프로파일링 중인 실행이 맡긴 작업이면 작업 스레드도 함께 기록합니다.
+        self._executor.submit(self._run, job, profiling.wrap_job(fn), args)
+        return job.id
+
+    def _run(self, job, fn, args):
+        job.started = time.monotonic()
+        try:
+            result, error, status = fn(*args), None, "done"
+        except Exception as e:
+            result, error, status = None, e, "error"
+        with self._lock:
+            job.result, job.error, job.status = result, error, status
+            job.finished = time.monotonic()
+            if self._active.get(job.key) == job.id:
+                del self._active[job.key]
+            callbacks, job.callbacks = job.callbacks, []
+        job.finished_event.set()
+        if status != "done":
+            return
+        latency_ms = (job.finished - job.started) * 1000
+        for callback in callbacks:
+            try:
+                callback(result, latency_ms)
+            except Exception:
+                pass  # 기록 실패가 다른 요청의 콜백이나 작업 결과를 막지 않도록
+
+    def get(self, job_id):
+        """작업 상태를 돌려줍니다. 보관 기간이 지나 정리된 작업이면 None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """작업이 끝날 때까지 최대 timeout 초 기다린 뒤 작업 상태를 돌려줍니다."""
+        job = self.get(job_id)
+        if job is not None:
+            job.finished_event.wait(timeout)
+        return job
+
+    def _prune_locked(self):
+        now = time.monotonic()
+        finished = [j for j in self._jobs.values() if j.done]
+        expired = {j.id for j in finished if now - j.finished > KEEP_SECONDS}
+        overflow = len(finished) - len(expired) - MAX_FINISHED
+        if overflow > 0:
+            oldest = sorted((j for j in finished if j.id not in expired), key=lambda j: j.finished)
+            expired.update(j.id for j in oldest[:overflow])
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+runner = JobRunner()
+
+
+def wait_for(job_id, message):
+    """
+    진행 중인 작업을 기다리는 동안 안내 문구를 보여 줍니다.
+    페이지 전체를 막지 않도록 이 부분만 fragment 로 주기적으로 다시 그리다가, 작업이 끝나면 전체를 다시 실행합니다.
+    """
+
+    @st.fragment(run_every=POLL_SECONDS)
+    def _poll():
+        job = runner.get(job_id)
+        if job is None or job.done:
+            st.rerun()
+        st.info(f"⏳ {message} ({job.elapsed:.0f}초 경과) — 예측을 바꾸거나 다른 입력을 해도 분석은 계속 진행됩니다.")
+
+    _poll()
+
+
+# ---------------------------------------------------------
+# 분석 페이지 공통 흐름
+# ---------------------------------------------------------
+def analysis_failed(text):
+    """
+    analyze_* 함수가 Gemini 호출에 실패했을 때 돌려주는 오류 문자열인지 확인합니다. (첫 줄에 '오류')
+    이런 결과는 분석 캐시에 오래 두지 않고, 보관소에도 남기지 않습니다.
+    """
+    return "오류" in text.split("\n", 1)[0]
+
+
+def source_analysis(scrape, analyze, prompt_version):
+    """
+    사료 수집 + AI 분석을 하는 작업 함수를 만듭니다.
+    작업 결과는 {"context": 사료 본문(없으면 ""), "result": 분석 결과 문자열} 입니다.
+    """
+
+    def run(name):
+        source = scrape(name) or NO_SOURCE
+        return {"context": source.text, "result": analyze(name, source.digest, prompt_version, source.text)}
+
+    return run
+
+
+def submit_analysis(page_key, name, fn, prediction=None, archive_page=None, summarize=None):
+    """
+    fn(name) 을 작업으로 맡기고 작업 정보만 session_state 에 저장합니다. (세션 상태는 모든 페이지가 함께 쓰므로 페이지별 키)
+    archive_page 를 주면 작업이 끝나는 즉시 summarize(result) → (판정, 자료 출처, 설명) 으로 보관소에 기록합니다.
+    summarize 가 None 을 돌려주면 (예: 문서를 찾지 못함) 기록하지 않습니다.
+    """
+    on_done = None
+    if archive_page is not None:
+
+        def on_done(result, latency_ms):
+            summary = summarize(result)
+            if summary is None:
+                return
+            verdict, source, explanation = summary
+            archive.record_analysis(
+                page=archive_page,
+                figure=name,
+                verdict=verdict,
+                prediction=prediction,
+                latency_ms=latency_ms,
+                source=source,
+                explanation=explanation,
+            )
+
+    job_id = runner.submit((page_key, name), fn, name, on_done=on_done)
+    st.session_state[f"{page_key}_job"] = {"id": job_id, "name": name, "prediction": prediction}
+    # 캐시된 결과라면 여기서 바로 끝나므로, 주기적 확인과 추가 재실행 없이 이번 실행에서 결과를 그립니다.
+    runner.wait(job_id, INSTANT_SECONDS)
+
+
+def analysis_result(page_key, waiting_message, divider=False):
+    """
+    세션에 저장된 분석 작업을 확인합니다.
+    진행 중이면 대기 안내(waiting_message 의 {name} 에 인물 이름)를, 실패했으면 오류를 보여 주고 None 을 돌려줍니다.
+    끝났으면 버튼을 누를 때의 (이름, 예측, 작업 결과) 를 돌려줍니다. divider 는 대기/결과 앞에 구분선을 그립니다.
+    """
+    info = st.session_state.get(f"{page_key}_job")
+    job = runner.get(info["id"]) if info else None
+    if job is None:
+        return None
+    if job.status == "error":
+        st.error(f"분석 중 오류 발생: {job.error}")
+        return None
+    if divider:
+        st.divider()
+    if not job.done:
+        wait_for(job.id, waiting_message.format(name=info["name"]))
+        return None
+    return info["name"], info["prediction"], job.result
+
+
+def has_analysis(page_key):
+    """이 페이지에서 맡긴 분석 작업이 (진행 중이든 끝났든) 남아 있는지 확인합니다."""
+    info = st.session_state.get(f"{page_key}_job")
+    return info is not None and runner.get(info["id"]) is not None
@@ -0,0 +1,190 @@
+"""
+Gemini 모델 라우터
+
+페이지마다 모델 이름을 고정해 두는 대신, 작업 종류와 프롬프트 길이에 맞는 가장 저렴한 모델을 고르고
+그 모델이 느려지거나 오류가 늘면 더 빠른 등급으로 내려가는(fallback cascade) 역할을 합니다.
+모델별 응답 시간, 오류율, 토큰 사용량은 메모리에 기록되어 라우팅 판단과 통계 화면에 쓰입니다.
+"""
+import threading
+import time
+from collections import deque
+
+import google.generativeai as genai
+
+# 빠르고 저렴한 등급 → 느리지만 정교한 등급 순서
+TIERS = [
+    "gemini-2.0-flash-lite",
+    "gemini-2.5-flash-lite",
+    "gemini-2.5-flash",
+]
+
+# 작업 종류별로 충분한 최소 등급 (TIERS 의 모델 이름)
+TASK_MIN_TIER = {
+    "classify": "gemini-2.5-flash-lite",       # 두 세력 중 하나를 고르는 분류
+    "classify_fine": "gemini-2.5-flash",       # 세 갈래 이상 세밀한 분류
+    "summarize": "gemini-2.5-flash-lite",      # 자료 요약/정리
+}
+
+# 프롬프트가 이 글자 수를 넘으면 한 등급 위 모델을 씁니다.
+LONG_CONTEXT_CHARS = 8000
+
+# 이 시간(초)보다 평균 응답이 느려지면 해당 모델을 잠시 건너뜁니다.
+SLOW_LATENCY_S = {
+    "gemini-2.0-flash-lite": 6.0,
+    "gemini-2.5-flash-lite": 8.0,
+    "gemini-2.5-flash": 15.0,
+}
+# 최근 기록 중 오류 비율이 이 값을 넘으면 해당 모델을 잠시 건너뜁니다.
+MAX_ERROR_RATE = 0.3
+# 건너뛰기 판단에 필요한 최소 기록 수와 기록 보관 시간(초)
+MIN_SAMPLES = 5
+WINDOW_SECONDS = 300
+# 건너뛴 모델을 다시 시험해 보기까지의 대기 시간(초)
+COOLDOWN_SECONDS = 60
+# 평균 응답 시간(EWMA) 가중치
+EWMA_ALPHA = 0.3
+
+
+class ModelStats:
+    """모델 하나의 호출 기록 (최근 구간의 성공/실패, 응답 시간, 토큰 수)"""
+
+    def __init__(self):
+        self.recent = deque()            # (시각, 성공 여부, 응답 시간)
+        self.ewma_latency = None
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_latency = 0.0
+        self.cooldown_until = 0.0
+
+    def _trim(self, now):
+        while self.recent and now - self.recent[0][0] > WINDOW_SECONDS:
+            self.recent.popleft()
+
+    def record(self, ok, latency, prompt_tokens=0, output_tokens=0):
+        now = time.monotonic()
+        self.recent.append((now, ok, latency))
+        self._trim(now)
+        self.calls += 1
+        self.total_latency += latency
+        if ok:
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self.ewma_latency = latency if self.ewma_latency is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+            )
+        else:
+            self.errors += 1
+
+    def error_rate(self):
+        self._trim(time.monotonic())
+        if not self.recent:
+            return 0.0
+        return sum(1 for _, ok, _ in self.recent if not ok) / len(self.recent)
+
+    def is_degraded(self, model_name):
+        """최근 오류율이나 평균 응답 시간이 기준을 넘었는지 확인합니다."""
+        if len(self.recent) < MIN_SAMPLES:
+            return False
+        if self.error_rate() > MAX_ERROR_RATE:
+            return True
+        return self.ewma_latency is not None and self.ewma_latency > SLOW_LATENCY_S.get(model_name, 10.0)
+
+
+class ModelRouter:
+    """작업/입력 길이로 모델을 고르고, 상태가 나쁜 모델은 더 빠른 등급으로 넘기는 라우터"""
+
+    def __init__(self, tiers=TIERS):
+        self.tiers = list(tiers)
+        self._models = {}
+        self._stats = {name: ModelStats() for name in self.tiers}
+        self._lock = threading.Lock()
+
+    def _model(self, name):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = genai.GenerativeModel(name)
+            return self._models[name]
+
+    def choose(self, task, prompt):
+        """작업 종류와 프롬프트 길이로 기본 모델 등급(TIERS 의 위치)을 정합니다."""
+        index = self.tiers.index(TASK_MIN_TIER.get(task, self.tiers[0]))
+        if len(prompt) > LONG_CONTEXT_CHARS:
+            index = min(index + 1, len(self.tiers) - 1)
+        return index
+
+    def cascade(self, task, prompt):
+        """
+        시도할 모델 순서를 돌려줍니다. 기본 모델부터 더 빠른 등급 순서이며,
+        대기(cooldown) 중인 모델은 뒤로 미루어 다른 모델이 모두 실패했을 때만 시도합니다.
+        """
+        start = self.choose(task, prompt)
+        order = [self.tiers[i] for i in range(start, -1, -1)]
+        now = time.monotonic()
+        with self._lock:
+            healthy = [m for m in order if self._stats[m].cooldown_until <= now]
+            cooling = [m for m in order if self._stats[m].cooldown_until > now]
+        return healthy + cooling
+
+    def generate_content(self, prompt, task="classify"):
+        """
+        라우팅된 모델로 generate_content 를 호출합니다.
+        실패하면 다음 모델로 넘어가고, 모든 모델이 실패하면 마지막 오류를 그대로 던집니다.
+        """
+        last_error = None
+        for name in self.cascade(task, prompt):
+            started = time.perf_counter()
+            try:
+                response = self._model(name).generate_content(prompt)
+                response.text  # 차단된 응답 등은 여기서 예외가 납니다.
+            except Exception as e:
+                self._record(name, False, time.perf_counter() - started)
+                last_error = e
+                continue
+
+            usage = getattr(response, "usage_metadata", None)
+            self._record(
+                name, True, time.perf_counter() - started,
+                getattr(usage, "prompt_token_count", 0) or 0,
+                getattr(usage, "candidates_token_count", 0) or 0,
+            )
+            return response
+        raise last_error
+
+    def _record(self, name, ok, latency, prompt_tokens=0, output_tokens=0):
+        with self._lock:
+            stats = self._stats[name]
+            stats.record(ok, latency, prompt_tokens, output_tokens)
+            # 대기 후 다시 시험한 호출이 성공하고 빨랐다면 지난 기록과 상관없이 계속 씁니다.
+            slow = latency > SLOW_LATENCY_S.get(name, 10.0)
+            if (not ok or slow) and stats.is_degraded(name):
+                stats.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+
+    def stats(self):
+        """모델별 누적 통계 (통계 화면 표시용)"""
+        now = time.monotonic()
+        rows = []
+        with self._lock:
+            for name in self.tiers:
+                s = self._stats[name]
+                rows.append({
+                    "모델": name,
+                    "호출 수": s.calls,
+                    "오류 수": s.errors,
+                    "최근 오류율(%)": round(s.error_rate() * 100, 1),
+                    "평균 응답(ms)": round(s.total_latency / s.calls * 1000) if s.calls else None,
+                    "최근 응답 EWMA(ms)": round(s.ewma_latency * 1000) if s.ewma_latency else None,
+                    "입력 토큰": s.prompt_tokens,
+                    "출력 토큰": s.output_tokens,
+                    "상태": "대기(건너뜀)" if s.cooldown_until > now else "정상",
+                })
+        return rows
+
+    def reset_stats(self):
+        """누적 통계와 대기 상태를 처음부터 다시 셉니다. (부하 테스트 단계마다 사용)"""
+        with self._lock:
+            self._stats = {name: ModelStats() for name in self.tiers}
+
+
+router = ModelRouter()
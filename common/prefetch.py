@@ -0,0 +1,147 @@
+"""
+자료 미리 가져오기 (speculative prefetch)
+
+학생이 인물 이름을 입력하는 순간 백그라운드 스레드에서 자료 검색(스크래핑)을 시작해 캐시를 데워 두면,
+'분석' 버튼을 눌렀을 때는 대부분 Gemini 응답만 기다리면 됩니다.
+
+오타나 입력 중간 값이 자료 사이트로 쏟아지지 않도록
+- 입력 후 잠시(DEBOUNCE_SECONDS) 기다렸다가 시작하고, 그 사이 같은 세션에서 새 이름이 들어오면 이전 것은 취소합니다.
+- 동시에 실행/대기할 수 있는 작업 수를 제한하고, 넘치면 미리 가져오기를 건너뜁니다.
+- 최근에 이미 가져온 이름은 다시 요청하지 않습니다.
+"""
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 입력 후 이 시간(초) 동안 새 입력이 없을 때만 시작합니다.
+DEBOUNCE_SECONDS = 0.6
+# 동시에 자료 사이트에 요청하는 작업 수
+MAX_WORKERS = 2
+# 실행 중 + 대기 중인 작업의 최대 개수 (넘치면 건너뜀)
+MAX_PENDING = 8
+# 같은 이름을 다시 미리 가져오지 않는 시간(초). 자료 캐시 유효 시간보다 짧게 둡니다.
+RECENT_SECONDS = 600
+
+# 인물 이름으로 볼 수 있는 입력 (한글/영문 2~20자, 공백·가운뎃점 허용)
+_NAME_PATTERN = re.compile(r"^[가-힣A-Za-z][가-힣A-Za-z ·.\-]{1,19}$")
+
+
+def looks_like_name(name):
+    """미리 가져올 만한 이름인지 간단히 확인합니다. (자모만 있는 입력 등은 제외)"""
+    return bool(name) and bool(_NAME_PATTERN.match(name.strip()))
+
+
+class Prefetcher:
+    """세션별 최신 입력 하나만 미리 가져오는, 크기가 제한된 백그라운드 작업기"""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._timers = {}        # owner → 대기 중인 debounce 타이머
+        self._futures = {}       # owner → 제출된 작업
+        self._inflight = set()   # 실행/대기 중인 작업 key
+        self._recent = {}        # key → 마지막으로 미리 가져온 시각
+
+    def schedule(self, owner, key, fn, *args):
+        """
+        owner(세션) 의 최신 입력으로 fn(*args) 를 미리 실행하도록 예약합니다.
+        같은 owner 의 이전 예약은 아직 시작 전이면 취소됩니다.
+        """
+        self.cancel(owner)
+        timer = threading.Timer(DEBOUNCE_SECONDS, self._submit, args=(owner, key, fn, args))
+        timer.daemon = True
+        with self._lock:
+            self._timers[owner] = timer
+        timer.start()
+
+    def cancel(self, owner):
+        """owner 의 대기 중인 예약과 아직 시작하지 않은 작업을 취소합니다."""
+        with self._lock:
+            timer = self._timers.pop(owner, None)
+            future = self._futures.pop(owner, None)
+        if timer:
+            timer.cancel()
+        if future:
+            future.cancel()
+
+    def _submit(self, owner, key, fn, args):
+        now = time.monotonic()
+        with self._lock:
+            if self._timers.get(owner) is None or self._timers[owner].args[1] != key:
+                return  # 그 사이 새 입력으로 바뀌었거나 취소됨
+            del self._timers[owner]
+            if key in self._inflight or now - self._recent.get(key, float("-inf")) < RECENT_SECONDS:
+                return
+            if len(self._inflight) >= self._max_pending:
+                return
+            self._inflight.add(key)
+            future = self._executor.submit(self._run, key, fn, args)
+            self._futures[owner] = future
+        # 취소되어 실행되지 않은 작업도 inflight 목록에서 빠지도록 합니다.
+        future.add_done_callback(lambda f: self._finish(owner, key, f))
+
+    def _run(self, key, fn, args):
+        try:
+            fn(*args)
+        except Exception:
+            pass  # 미리 가져오기는 실패해도 버튼을 누를 때 다시 시도되므로 무시합니다.
+
+    def _finish(self, owner, key, future):
+        with self._lock:
+            self._inflight.discard(key)
+            # 끝난 작업은 owner 목록에서 지웁니다. (그 사이 같은 owner 가 새 작업을 제출했다면 그대로 둠)
+            if self._futures.get(owner) is future:
+                del self._futures[owner]
+            if not future.cancelled():
+                self._recent[key] = time.monotonic()
+                # 오래된 기록 정리
+                cutoff = time.monotonic() - RECENT_SECONDS
+                for k in [k for k, t in self._recent.items() if t < cutoff]:
+                    del self._recent[k]
+
+
+prefetcher = Prefetcher()
+
+
+def session_owner(session_state):
+    """세션마다 고유한 prefetch owner id 를 session_state 에 만들어 돌려줍니다."""
+    if "_prefetch_owner" not in session_state:
+        session_state["_prefetch_owner"] = uuid.uuid4().hex
+    return session_state["_prefetch_owner"]
+
+
+def prefetch_source(session_state, page, widget_key, scrape_fn):
+    """
+    text_input 의 on_change 콜백으로 쓰는 도우미입니다.
+    session_state[widget_key] 에 입력된 이름으로 자료 검색(scrape_fn)을 미리 시작합니다.
+    """
+    owner = f"{page}:{session_owner(session_state)}"
+    # 버튼을 눌렀을 때와 같은 캐시 키가 되도록 입력값을 그대로 넘깁니다.
+    name = session_state.get(widget_key) or ""
+    if not looks_like_name(name):
+        prefetcher.cancel(owner)
+        return
+    prefetcher.schedule(owner, (page, name), scrape_fn, name)
+
+
+# 검색 결과의 후보 문서를 미리 가져오는 작업기 (세션과 무관하게 바로 실행)
+_candidate_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch-candidate")
+
+
+def prefetch_all(fetch_fn, items):
+    """
+    items 각각에 대해 fetch_fn(item) 을 백그라운드에서 동시에 실행해 캐시를 데워 둡니다.
+    결과는 기다리지 않으며, 실패해도 나중에 실제로 필요할 때 다시 시도되므로 무시합니다.
+    """
+    for item in items:
+        _candidate_executor.submit(_run_quietly, fetch_fn, item)
+
+
+def _run_quietly(fn, *args):
+    try:
+        fn(*args)
+    except Exception:
+        pass
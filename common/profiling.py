@@ -0,0 +1,304 @@
+"""
+페이지 실행 프로파일링 (필요할 때만 켜는 모드)
+
+페이지가 느리게 느껴질 때 시간이 어디에 쓰이는지(모듈 수준의 genai 설정, BeautifulSoup 파싱,
+캐시 키 해시, 마크다운 출력 등) 확인하기 위한 도구입니다. 평소에는 꺼져 있어 비용이 거의 없고,
+다음 중 하나로 켭니다.
+
+- 환경 변수 HISTORY_APP_PROFILE=1 : 모든 세션의 모든 스크립트 실행을 기록
+- 주소 뒤에 ?profile=1 : 그 세션에서만 기록 (?profile=0 으로 끔). 운영자 세션에서만 받아들입니다.
+
+운영자 세션은 주소에 ?admin=<토큰> 을 붙여 연 세션으로, 토큰은 .streamlit/secrets.toml 의
+PROFILE_ADMIN_TOKEN 과 같아야 합니다. 토큰이 설정되어 있지 않으면 운영자 세션은 없습니다.
+기록 목록 페이지도 운영자 세션에서만 열립니다.
+
+켜져 있으면 스크립트 실행마다 cProfile 과 샘플링(일정 간격으로 호출 스택 채집)을 함께 돌리고,
+가장 느렸던 실행 KEEP_SLOWEST 개만 디스크에 남깁니다.
+(data/profiles/ 아래 .prof = pstats 파일, .folded = flame graph 용 접힌 스택, .json = 요약)
+기록 중인 실행이 맡긴 분석 작업(common.jobs)도 작업 스레드에서 따로 기록해, 제출한 실행 id 에
+'-job-' 을 붙인 id 로 함께 남깁니다.
+목록은 '실행 프로파일 기록' 페이지에서 보고 내려받을 수 있습니다.
+
+Python 3.12 부터 cProfile 은 프로세스 전체에서 하나만 켤 수 있고 모든 스레드를 기록하므로,
+3.12 이상에서는 한 번에 한 실행만 cProfile 을 쓰고 나머지 실행은 샘플링만 기록합니다.
+"""
+import cProfile
+import functools
+import hmac
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import streamlit as st
+
+PROFILE_DIR = os.environ.get(
+    "HISTORY_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "profiles"),
+)
+PROFILE_ENV = "HISTORY_APP_PROFILE"
+# 운영자 세션을 여는 토큰이 들어 있는 st.secrets 키
+ADMIN_TOKEN_SECRET = "PROFILE_ADMIN_TOKEN"
+
+# 디스크에 남기는 가장 느린 실행 수
+KEEP_SLOWEST = 20
+# 호출 스택 채집 간격(초)
+SAMPLE_INTERVAL = 0.005
+# 이 시간(초)이 지나도 끝나지 않은 실행은 (st.stop 등으로 중간에 끝난 것으로 보고) 기록을 버립니다.
+MAX_RUN_SECONDS = 120
+# 요약에 보여 줄 상위 함수 수
+SUMMARY_LINES = 25
+
+_lock = threading.Lock()
+_save_lock = threading.Lock()
+_active = {}  # 스크립트 스레드 id → 진행 중인 _Run
+
+# 3.12 이상: sys.monitoring 기반 cProfile 은 동시에 하나만 켤 수 있습니다.
+_CPROFILE_EXCLUSIVE = sys.version_info >= (3, 12)
+_cprofile_lock = threading.Lock()
+
+
+def _admin_token():
+    try:
+        return st.secrets.get(ADMIN_TOKEN_SECRET)
+    except FileNotFoundError:  # secrets.toml 이 없음
+        return None
+
+
+def is_operator():
+    """?admin= 주소 매개변수의 토큰이 st.secrets 의 운영자 토큰과 맞는 세션인지 확인합니다."""
+    given = st.query_params.get("admin")
+    if given is not None:
+        token = _admin_token()
+        # 페이지를 옮겨 주소 매개변수가 사라져도 세션 동안은 유지되도록 저장합니다.
+        st.session_state["_profile_operator"] = bool(token) and hmac.compare_digest(
+            str(given).encode(), str(token).encode()
+        )
+    return st.session_state.get("_profile_operator", False)
+
+
+def is_enabled():
+    """환경 변수나 (운영자 세션의) ?profile= 주소 매개변수로 프로파일링이 켜졌는지 확인합니다."""
+    if os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on"):
+        return True
+    if not is_operator():
+        return False
+    flag = st.query_params.get("profile")
+    if flag is not None:
+        st.session_state["_profile_enabled"] = flag == "1"
+    return st.session_state.get("_profile_enabled", False)
+
+
+class _Sampler(threading.Thread):
+    """대상 스레드의 호출 스택을 일정 간격으로 채집해 접힌 스택(folded stack) 개수로 모읍니다."""
+
+    def __init__(self, thread_id, root_file):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.root_file = root_file
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        deadline = time.monotonic() + MAX_RUN_SECONDS
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or time.monotonic() > deadline:
+                break
+            self.stacks[self._fold(frame)] += 1
+
+    def _fold(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            # Streamlit 실행기 내부 프레임은 빼고 페이지 스크립트부터 보여 줍니다.
+            if code.co_filename == self.root_file:
+                break
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class _Run:
+    def __init__(self, page, root_file, parent_id=None):
+        self.id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        if parent_id is not None:
+            self.id = f"{parent_id}-job-{uuid.uuid4().hex[:6]}"
+        self.page = page
+        self.parent_id = parent_id
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.sampler = _Sampler(threading.get_ident(), root_file)
+        self._holds_cprofile = False
+
+    def start(self):
+        self.sampler.start()
+        if _CPROFILE_EXCLUSIVE:
+            self._holds_cprofile = _cprofile_lock.acquire(blocking=False)
+            if not self._holds_cprofile:
+                self.profiler = None  # 다른 실행이 cProfile 을 쓰는 중이면 샘플링만 기록합니다.
+                return
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # 디버거 등 다른 프로파일링 도구가 이미 켜져 있어도 페이지는 그대로 실행합니다.
+            self.profiler = None
+            self._release_cprofile()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self._release_cprofile()
+        self.sampler.stopped.set()
+        self.sampler.join()
+        return (time.perf_counter() - self.started) * 1000
+
+    def _release_cprofile(self):
+        if self._holds_cprofile:
+            self._holds_cprofile = False
+            _cprofile_lock.release()
+
+
+def _prune_locked():
+    """스레드가 이미 끝났거나 MAX_RUN_SECONDS 를 넘긴 실행을 _active 에서 빼서 돌려줍니다."""
+    alive = {t.ident for t in threading.enumerate()}
+    now = time.perf_counter()
+    stale = [
+        thread_id for thread_id, run in _active.items()
+        if thread_id not in alive or now - run.started > MAX_RUN_SECONDS
+    ]
+    return [_active.pop(thread_id) for thread_id in stale]
+
+
+def begin(page):
+    """
+    페이지 스크립트 맨 처음에 호출합니다. 프로파일링이 꺼져 있으면 아무 일도 하지 않습니다.
+    같은 스레드에서 끝나지 않은 이전 실행(st.stop/st.rerun 으로 중단됨)이나
+    스레드가 사라진 실행이 있으면 버립니다.
+    """
+    if not is_enabled():
+        return
+    root_file = sys._getframe(1).f_code.co_filename
+    run = _Run(page, root_file)
+    with _lock:
+        dropped = _prune_locked()
+        previous = _active.pop(threading.get_ident(), None)
+        _active[threading.get_ident()] = run
+    if previous is not None:
+        dropped.append(previous)
+    for old in dropped:
+        old.stop()
+    run.start()
+
+
+def end():
+    """페이지 스크립트 맨 끝에서 호출합니다. 이번 실행이 충분히 느렸다면 기록을 저장합니다."""
+    with _lock:
+        run = _active.pop(threading.get_ident(), None)
+    if run is None:
+        return
+    _finish(run)
+
+
+def wrap_job(fn):
+    """
+    지금 스크립트 실행을 기록 중이면, 작업 스레드에서 도는 fn 도 따로 기록하도록 감싸서 돌려줍니다.
+    (기록 중이 아니면 fn 을 그대로 돌려줍니다. common.jobs 가 작업을 맡길 때 호출합니다.)
+    """
+    with _lock:
+        parent = _active.get(threading.get_ident())
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def profiled(*args):
+        run = _Run(f"{parent.page} · 분석 작업", sys._getframe().f_code.co_filename, parent_id=parent.id)
+        run.start()
+        try:
+            return fn(*args)
+        finally:
+            _finish(run)
+
+    return profiled
+
+
+def _finish(run):
+    duration_ms = run.stop()
+    try:
+        with _save_lock:
+            _save(run, duration_ms)
+    except OSError:
+        pass  # 기록 저장 실패가 페이지 표시를 막지 않도록 합니다.
+
+
+def _save(run, duration_ms):
+    runs = list_runs()
+    if len(runs) >= KEEP_SLOWEST and duration_ms <= runs[-1]["duration_ms"]:
+        return  # 이미 남겨 둔 실행들보다 빠르면 저장하지 않습니다.
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, run.id)
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        for stack, count in run.sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    summary = io.StringIO()
+    if run.profiler is not None:
+        run.profiler.dump_stats(base + ".prof")
+        pstats.Stats(run.profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    else:
+        summary.write("다른 실행이나 도구가 cProfile 을 쓰고 있어 샘플링만 기록했습니다. 많이 채집된 호출 스택:\n\n")
+        for stack, count in run.sampler.stacks.most_common(SUMMARY_LINES):
+            summary.write(f"{count:>6}  {stack}\n")
+    meta = {
+        "id": run.id,
+        "page": run.page,
+        "parent": run.parent_id,
+        "started_at": run.started_at.isoformat(timespec="seconds"),
+        "duration_ms": round(duration_ms, 1),
+        "samples": sum(run.sampler.stacks.values()),
+        "summary": summary.getvalue(),
+    }
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    # 가장 느린 KEEP_SLOWEST 개만 남깁니다.
+    for old in list_runs()[KEEP_SLOWEST:]:
+        delete_run(old["id"])
+
+
+def list_runs():
+    """저장된 실행 기록 요약을 느린 순서로 돌려줍니다."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    runs = []
+    for filename in os.listdir(PROFILE_DIR):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, filename), encoding="utf-8") as f:
+                runs.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(runs, key=lambda r: r["duration_ms"], reverse=True)
+
+
+def run_file(run_id, suffix):
+    """실행 기록 파일(.prof / .folded) 경로를 돌려줍니다. 없으면 None."""
+    path = os.path.join(PROFILE_DIR, os.path.basename(run_id) + suffix)
+    return path if os.path.exists(path) else None
+
+
+def delete_run(run_id):
+    """실행 기록 하나를 지웁니다."""
+    for suffix in (".json", ".prof", ".folded"):
+        path = run_file(run_id, suffix)
+        if path:
+            os.remove(path)
@@ -0,0 +1,26 @@
+"""
+스크래핑한 자료(사료)와 그 내용 요약값(digest)
+
+분석 캐시가 수 KB 짜리 자료 본문을 그대로 키로 쓰면, 캐시를 찾을 때마다 본문을 해시·비교해야 하고
+캐시 항목마다 본문이 키 안에 한 번 더 붙잡혀 있게 됩니다.
+스크래핑할 때 본문의 digest 를 한 번만 계산해 함께 돌려주고, 분석 캐시는
+(인물, 자료 digest, 프롬프트 버전) 으로만 찾도록 합니다. 본문은 밑줄(_)로 시작하는 인자로 넘겨 키에서 뺍니다.
+
+스크래핑 함수는 검색은 됐지만 결과가 없으면 NO_SOURCE 를, 요청 자체가 실패하면 None 을 돌려줍니다.
+NO_SOURCE 는 정상 결과로 캐시되어 결과가 없는 인물을 누를 때마다 다시 스크래핑하지 않고,
+None 은 swr_cache 가 짧게만 보관해 곧 다시 시도합니다.
+"""
+import hashlib
+from collections import namedtuple
+
+Source = namedtuple("Source", ["text", "digest"])
+
+# 자료를 찾지 못했을 때 (AI 지식만으로 분석)
+NO_SOURCE = Source(None, None)
+
+
+def make_source(text):
+    """자료 본문과 그 digest 를 묶어 돌려줍니다. 본문이 비어 있으면 NO_SOURCE."""
+    if not text:
+        return NO_SOURCE
+    return Source(text, hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest())
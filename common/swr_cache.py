@@ -0,0 +1,203 @@
+"""
+stale-while-revalidate 캐시
+
+st.cache_data(ttl=3600) 은 유효 시간이 지나면 항목을 버리기 때문에, 만료 직후 인기 인물을 처음 요청한
+학생이 스크래핑과 Gemini 호출 시간을 모두 기다려야 했습니다. 이 데코레이터는
+
+- soft_ttl 이 지나기 전: 캐시된 값을 그대로 돌려주고,
+- soft_ttl ~ hard_ttl 사이: 캐시된(조금 오래된) 값을 즉시 돌려주면서 백그라운드에서 새 값으로 갱신하고,
+- hard_ttl 이 지난 뒤(또는 처음): 그 자리에서 계산합니다.
+
+같은 키의 계산/갱신은 키별 잠금으로 한 번만 일어나며, 갱신이 실패하거나 validate 를 통과하지 못하면
+기존 값을 hard_ttl 까지 계속 사용합니다. 그 자리에서 계산한 값이 validate 를 통과하지 못하면
+(예: 스크래핑 실패로 나온 None) negative_ttl 동안만 보관해, 그동안의 요청은 같은 실패를 바로 돌려받고
+그 뒤에 다시 계산합니다. 함수가 예외를 던지면 아무것도 저장하지 않습니다.
+st.cache_data 와 마찬가지로 이름이 밑줄(_)로 시작하는 인자는 캐시 키에서 제외됩니다.
+"""
+import functools
+import hashlib
+import inspect
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 백그라운드 갱신에 쓰는 스레드 수
+REFRESH_WORKERS = 4
+
+_registry = {}
+_registry_lock = threading.Lock()
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="swr-refresh")
+
+
+class _Entry:
+    __slots__ = ("value", "created", "negative")
+
+    def __init__(self, value, created, negative=False):
+        self.value = value
+        self.created = created
+        self.negative = negative  # validate 를 통과하지 못한 값 (negative_ttl 동안만 사용)
+
+
+class _SWRStore:
+    """함수 하나에 대한 캐시 저장소 (페이지가 다시 실행되어도 같은 저장소를 씁니다)"""
+
+    def __init__(self, soft_ttl, hard_ttl, max_entries, negative_ttl):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.key_locks = {}
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def usable(self, entry):
+        """그 자리에서 다시 계산하지 않고 돌려줄 수 있는 항목인지 확인합니다."""
+        ttl = self.negative_ttl if entry.negative else self.hard_ttl
+        return time.monotonic() - entry.created < ttl
+
+    def put(self, key, value, negative=False):
+        with self.lock:
+            self.entries[key] = _Entry(value, time.monotonic(), negative)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                old_key, _ = self.entries.popitem(last=False)
+                self.key_locks.pop(old_key, None)
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def forget_lock(self, key):
+        """저장된 항목이 없는 키의 잠금을 지웁니다. (항목과 함께 정리되지 않는 잠금이 쌓이지 않도록)"""
+        with self.lock:
+            if key not in self.entries:
+                self.key_locks.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.key_locks.clear()
+
+
+def _hash_code(code, hasher):
+    hasher.update(code.co_code)
+    for const in code.co_consts:
+        # 내부 함수/컴프리헨션의 code 객체는 repr 에 메모리 주소가 들어가므로 내용으로 해시합니다.
+        if inspect.iscode(const):
+            _hash_code(const, hasher)
+        else:
+            hasher.update(repr(const).encode("utf-8"))
+
+
+def _function_id(func):
+    """페이지 스크립트가 다시 실행되어 함수가 새로 만들어져도 같은 값이 나오는 식별자"""
+    hasher = hashlib.md5()
+    _hash_code(func.__code__, hasher)
+    return (func.__code__.co_filename, func.__qualname__, hasher.hexdigest())
+
+
+def _make_key(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    parts = tuple((name, value) for name, value in bound.arguments.items() if not name.startswith("_"))
+    try:
+        hash(parts)
+        return parts
+    except TypeError:
+        return hashlib.md5(pickle.dumps(parts)).hexdigest()
+
+
+def swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, max_entries=1000, validate=None, negative_ttl=60):
+    """
+    stale-while-revalidate 캐시 데코레이터.
+
+    soft_ttl: 이 시간(초)이 지나면 기존 값을 돌려주면서 백그라운드에서 갱신합니다.
+    hard_ttl: 이 시간(초)이 지난 값은 쓰지 않고 그 자리에서 다시 계산합니다.
+    validate: 계산/갱신 결과가 정상인지 확인합니다. (기본: None 이 아니면 정상)
+              백그라운드 갱신 결과가 통과하지 못하면 기존 값을 유지하고,
+              그 자리에서 계산한 결과가 통과하지 못하면 negative_ttl(초) 동안만 보관합니다.
+    """
+    validate = validate or (lambda value: value is not None)
+
+    def decorator(func):
+        func_id = _function_id(func)
+        with _registry_lock:
+            store = _registry.get(func_id)
+            if store is None:
+                store = _registry[func_id] = _SWRStore(soft_ttl, hard_ttl, max_entries, negative_ttl)
+        signature = inspect.signature(func)
+
+        def _compute(key, args, kwargs):
+            """키별 잠금을 잡고 계산합니다. 다른 스레드가 먼저 계산했다면 그 값을 씁니다."""
+            with store.key_lock(key):
+                entry = store.get(key)
+                if entry is not None and store.usable(entry):
+                    return entry.value
+                try:
+                    value = func(*args, **kwargs)
+                except Exception:
+                    store.forget_lock(key)
+                    raise
+                # 실패한 결과는 짧게만 보관해, 같은 키를 기다리던 요청이 차례로 다시 계산하지 않게 합니다.
+                store.put(key, value, negative=not validate(value))
+                return value
+
+        def _refresh(key, args, kwargs):
+            try:
+                with store.key_lock(key):
+                    value = func(*args, **kwargs)
+                    if validate(value):
+                        store.put(key, value)
+            except Exception:
+                pass  # 갱신에 실패하면 기존 값을 hard_ttl 까지 계속 씁니다.
+            finally:
+                with store.lock:
+                    store.refreshing.discard(key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(signature, args, kwargs)
+            entry = store.get(key)
+            if entry is None:
+                return _compute(key, args, kwargs)
+
+            age = time.monotonic() - entry.created
+            if entry.negative:
+                # 실패한 결과는 백그라운드 갱신 없이 negative_ttl 이 지나면 그 자리에서 다시 계산합니다.
+                return entry.value if store.usable(entry) else _compute(key, args, kwargs)
+            if age < store.soft_ttl:
+                return entry.value
+            if age >= store.hard_ttl:
+                return _compute(key, args, kwargs)
+
+            # soft_ttl 이 지난 값: 바로 돌려주고, 아직 갱신 중이 아니면 백그라운드 갱신을 시작합니다.
+            with store.lock:
+                start_refresh = key not in store.refreshing
+                if start_refresh:
+                    store.refreshing.add(key)
+            if start_refresh:
+                _refresh_executor.submit(_refresh, key, args, kwargs)
+            return entry.value
+
+        wrapper.clear = store.clear
+        return wrapper
+
+    return decorator
+
+
+def clear_all():
+    """모든 swr_cache 저장소를 비웁니다. (부하 테스트 등에서 사용)"""
+    with _registry_lock:
+        stores = list(_registry.values())
+    for store in stores:
+        store.clear()
@@ -0,0 +1,138 @@
+"""
+분석 캐시 키 벤치마크: 자료 본문 키 vs 자료 digest 키
+
+분석 함수가 (인물, 자료 본문) 을 캐시 키로 쓸 때와 (인물, 자료 digest, 프롬프트 버전) 을 쓸 때,
+캐시 적중 한 번에 드는 CPU 시간과 캐시 항목 하나가 붙잡는 메모리를 비교합니다.
+자료 본문은 stub 자료 서버가 돌려주는 HTML 을 페이지와 같은 방식으로 파싱해 만듭니다.
+
+- 본문 키(같은 객체): 캐시에 넣을 때 쓴 문자열 객체를 그대로 다시 넘기는 경우 (해시값이 문자열에 저장되어 있음)
+- 본문 키(새 객체): 자료 캐시가 갱신되는 등으로 내용은 같지만 새로 만들어진 문자열이 넘어오는 경우
+  (해시를 다시 계산하고, 사전 조회 때 본문 전체를 비교함)
+- digest 키: 스크래핑할 때 한 번 계산한 digest 만 키로 씀
+
+사용 예 (저장소 루트에서):
+    python -m loadtest.bench_cache_keys --entries 200 --hits 20000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from common.sources import make_source  # noqa: E402
+from common.swr_cache import swr_cache  # noqa: E402
+from loadtest.stubs import _aks_article_html, _history_db_html, _wiki_html  # noqa: E402
+
+PROMPT_VERSION = 1
+
+
+def _fixtures():
+    """페이지별 스크래핑 결과와 같은 모양의 자료 본문 (이름 → 본문 함수)"""
+
+    def history_db(name):
+        soup = BeautifulSoup(_history_db_html(name), "html.parser")
+        return " ".join(item.get_text(strip=True) for item in soup.select(".search_list li .cont")[:3])
+
+    def aks(name):
+        soup = BeautifulSoup(_aks_article_html(name), "html.parser")
+        return soup.find("div", {"class": "content_view"}).get_text(strip=True)[:4000]
+
+    def wiki(name):
+        soup = BeautifulSoup(_wiki_html(name), "html.parser")
+        return "".join(p.get_text() + "\n" for p in soup.find("div", {"class": "mw-parser-output"}).find_all("p"))[:6000]
+
+    return {"국사편찬위원회": history_db, "AKS": aks, "위키백과": wiki}
+
+
+def _make_functions():
+    # 함수마다 별도의 캐시 저장소가 생기도록 매번 새로 정의합니다.
+    @swr_cache(max_entries=100_000)
+    def analyze_by_text(name, context_text):
+        return f"결론: {name}"
+
+    @swr_cache(max_entries=100_000)
+    def analyze_by_digest(name, source_digest, prompt_version, _context_text):
+        return f"결론: {name}"
+
+    analyze_by_text.clear()
+    analyze_by_digest.clear()
+    return analyze_by_text, analyze_by_digest
+
+
+def _fresh_copy(text):
+    """내용은 같지만 해시값이 아직 계산되지 않은 새 문자열 객체"""
+    return text[:1] + text[1:]
+
+
+def _cpu_seconds(fn, calls):
+    started = time.process_time()
+    for args in calls:
+        fn(*args)
+    return time.process_time() - started
+
+
+def bench(label, fetch, entries, hits, batch=1000):
+    names = [f"인물{i}" for i in range(entries)]
+    texts = [fetch(name) for name in names]
+
+    # digest 계산은 스크래핑할 때 한 번만 합니다.
+    started = time.process_time()
+    sources = [make_source(text) for text in texts]
+    digest_once_us = (time.process_time() - started) / entries * 1e6
+
+    # 캐시 항목 하나가 붙잡는 메모리 (자료 캐시가 갱신된 뒤에도 분석 캐시 키가 옛 본문을 붙잡고 있는 상황)
+    by_text, by_digest = _make_functions()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for name, text in zip(names, texts):
+        by_text(name, _fresh_copy(text))
+    text_bytes = (tracemalloc.get_traced_memory()[0] - before) / entries
+    before = tracemalloc.get_traced_memory()[0]
+    for name, source in zip(names, sources):
+        by_digest(name, source.digest, PROMPT_VERSION, source.text)
+    digest_bytes = (tracemalloc.get_traced_memory()[0] - before) / entries
+    tracemalloc.stop()
+
+    # 적중 한 번의 CPU 시간 (모두 캐시 적중)
+    order = [i % entries for i in range(hits)]
+    same = _cpu_seconds(by_text, [(names[i], texts[i]) for i in order])
+    fresh = 0.0
+    for start in range(0, hits, batch):
+        # 새 문자열은 측정 밖에서 조금씩 만들어 메모리 사용을 제한합니다.
+        calls = [(names[i], _fresh_copy(texts[i])) for i in order[start:start + batch]]
+        fresh += _cpu_seconds(by_text, calls)
+    digest = _cpu_seconds(
+        by_digest, [(names[i], sources[i].digest, PROMPT_VERSION, sources[i].text) for i in order]
+    )
+
+    return {
+        "자료": label,
+        "평균 본문 글자 수": round(sum(map(len, texts)) / entries),
+        "본문 키 적중(같은 객체) µs": round(same / hits * 1e6, 2),
+        "본문 키 적중(새 객체) µs": round(fresh / hits * 1e6, 2),
+        "digest 키 적중 µs": round(digest / hits * 1e6, 2),
+        "digest 계산(스크래핑당 1회) µs": round(digest_once_us, 2),
+        "본문 키 항목당 메모리 B": round(text_bytes),
+        "digest 키 항목당 메모리 B": round(digest_bytes),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="분석 캐시 키 벤치마크 (자료 본문 vs digest)")
+    parser.add_argument("--entries", type=int, default=200, help="자료별 캐시 항목 수")
+    parser.add_argument("--hits", type=int, default=20000, help="적중 측정 반복 횟수")
+    args = parser.parse_args(argv)
+
+    for label, fetch in _fixtures().items():
+        row = bench(label, fetch, args.entries, args.hits)
+        print(" · ".join(f"{k}: {v}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
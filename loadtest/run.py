@@ -0,0 +1,315 @@
+"""
+Streamlit 페이지 동시 접속 부하 테스트
+
+실제 페이지 스크립트를 Streamlit AppTest 로 N개 세션에서 동시에 실행하면서
+(인물 이름 입력 → 분석 버튼 클릭) 동시 접속 수가 늘어날 때 한 서버(replica)의
+처리량, 페이지별 p50/p99 지연, 스레드 수, 메모리 사용량이 어떻게 변하는지 측정합니다.
+외부 자료 사이트와 Gemini 는 모두 로컬 stub 으로 대체되므로 실제 API 를 호출하지 않습니다.
+
+사용 예 (저장소 루트에서):
+    python -m loadtest.run --concurrency 1 2 4 8 16 --rounds 3
+    python -m loadtest.run --pages 개화파 일제강점기 --gemini-latency 1.5 --gemini-error-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, "pages")
+
+# 부하 테스트 중 생기는 분석 기록이 실제 보관소에 섞이지 않도록 임시 폴더를 씁니다.
+os.environ.setdefault("HISTORY_ARCHIVE_DIR", tempfile.mkdtemp(prefix="loadtest-archive-"))
+# 세션마다 반복되는 Streamlit 경고 로그가 결과 출력을 가리지 않도록 합니다.
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.runtime.runtime import Runtime  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.runtime.secrets import Secrets  # noqa: E402
+from streamlit.runtime.state.common import GENERATED_ELEMENT_ID_PREFIX  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from unittest import mock  # noqa: E402
+
+from common import jobs, swr_cache  # noqa: E402
+from common.model_router import router  # noqa: E402
+from loadtest.stubs import StubGenerativeModel, StubSourceServer, redirect_requests  # noqa: E402
+
+# 페이지들은 magic 기능을 쓰지 않습니다. magic 변환(ast.parse)을 여러 세션 스레드에서 동시에 하면
+# Python 3.11 에서 SystemError(AST constructor recursion depth mismatch)가 날 수 있어 끕니다.
+st.config.set_option("runner.magicEnabled", False)
+
+# 페이지 단축 이름 → (파일 이름, 테스트에 쓸 인물 이름 목록)
+PAGES = {
+    "개화파": ("개화파와_위정척사파_분류기.py", ["김옥균", "최익현", "박영효", "이항로", "김홍집"]),
+    "권문세족": ("고려_말_권문세족과_신진사대부_분류_모델.py", ["이성계", "정몽주", "이인임", "최영", "정도전"]),
+    "사대부": ("고려_말_온건파_사대부와_급진파_사대부의_분류모델.py", ["정몽주", "정도전", "이색", "조준", "길재"]),
+    "병자호란": ("병자호란당시_주전론자와_주화론자_분류모델.py", ["김상헌", "최명길", "윤집", "오달제", "홍익한"]),
+    "세계사": ("세계사_인물_검색기(위키백과_웹스크래핑).py", ["나폴레옹", "칭기즈 칸", "링컨", "간디", "카이사르"]),
+    "일제강점기": ("일제강점기_한국사인물_성향_분류기(한국민족문화대백과_웹스크래핑).py", ["안중근", "김구", "이광수", "안창호", "김원봉"]),
+}
+
+
+def _rss_mb():
+    """현재 프로세스의 메모리(RSS, MB). /proc 이 없는 환경에서는 최대 RSS 로 대신합니다."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResourceSampler:
+    """부하 구간 동안 스레드 수와 메모리를 주기적으로 기록합니다."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.max_threads = 0
+        self.max_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="resource-sampler", daemon=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.max_threads = max(self.max_threads, threading.active_count())
+            self.max_rss_mb = max(self.max_rss_mb, _rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, q):
+    """nearest-rank 방식 백분위수 (q: 0~100)"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+# 결과가 나왔는지 다시 확인하는 간격(초). 실제 화면의 결과 확인 fragment 와 같은 간격을 씁니다.
+POLL_SECONDS = jobs.POLL_SECONDS
+# 하네스 오류가 난 세션을 다시 시도하는 횟수
+HARNESS_RETRIES = 1
+
+
+class HarnessError(Exception):
+    """페이지가 아니라 부하 테스트 도구(AppTest 세션들이 함께 쓰는 Runtime/스크립트 캐시) 쪽에서 난 오류"""
+
+
+def _run(at):
+    """at.run() 을 실행하고, AppTest 자체에서 난 예외는 HarnessError 로 바꿉니다.
+
+    페이지에서 난 예외는 AppTest 가 잡아 at.exception 으로 보여 주므로, at.run() 밖으로 나온
+    예외는 (제한 시간 초과를 빼면) 하네스 쪽 문제입니다.
+    """
+    try:
+        return at.run()
+    except RuntimeError as e:
+        if "timed out" in str(e):
+            raise
+        raise HarnessError(f"{type(e).__name__}: {e}") from e
+    except Exception as e:
+        raise HarnessError(f"{type(e).__name__}: {e}") from e
+
+
+def _check_exception(at):
+    """화면에 나온 예외를 하네스 오류와 페이지 오류로 나누어 올립니다."""
+    if not at.exception:
+        return
+    message = at.exception[0].value
+    # 위젯 ID 를 찾지 못하는 KeyError('$$ID-…')는 세션들이 Runtime 을 함께 쓰면서 생기는 것으로,
+    # 실제 서버의 세션별 상태에서는 일어나지 않습니다.
+    if GENERATED_ELEMENT_ID_PREFIX in message:
+        raise HarnessError(message)
+    raise RuntimeError(message)
+
+
+def run_session(page_key, name_pool, timeout):
+    """세션 하나: 페이지 열기 → 인물 입력 → 분석 버튼 클릭. 클릭 후 결과까지 걸린 시간(초)을 돌려줍니다."""
+    filename, names = PAGES[page_key]
+    at = AppTest.from_file(os.path.join(PAGES_DIR, filename), default_timeout=timeout)
+    _run(at)
+    _check_exception(at)
+    at.text_input[0].input(random.choice(names[:name_pool]))
+    _run(at)
+    _check_exception(at)
+    started = time.perf_counter()
+    at.button[0].click()
+    _run(at)
+    # 분석은 백그라운드 작업으로 돌기 때문에, 결과가 화면에 나올 때까지 브라우저처럼 다시 실행하며 확인합니다.
+    while not (at.exception or at.error or any("분석 결과" in h.value for h in at.subheader)):
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError(f"{page_key}: {timeout}초 안에 결과가 나오지 않았습니다.")
+        time.sleep(POLL_SECONDS)
+        _run(at)
+    elapsed = time.perf_counter() - started
+    _check_exception(at)
+    return elapsed
+
+
+def run_level(concurrency, page_keys, rounds, name_pool, timeout):
+    """동시 세션 concurrency 개로 rounds 번씩 반복 실행하고 결과를 모읍니다."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    error_messages = {}
+    harness_errors = defaultdict(int)
+    harness_messages = {}
+    lock = threading.Lock()
+
+    def worker(index):
+        for r in range(rounds):
+            page_key = page_keys[(index + r) % len(page_keys)]
+            for attempt in range(HARNESS_RETRIES + 1):
+                try:
+                    elapsed = run_session(page_key, name_pool, timeout)
+                    with lock:
+                        latencies[page_key].append(elapsed)
+                    break
+                except HarnessError as e:
+                    # 페이지 오류로 세지 않고 따로 기록한 뒤 세션을 다시 시도합니다.
+                    with lock:
+                        harness_errors[page_key] += 1
+                        harness_messages.setdefault(page_key, str(e)[:200])
+                except Exception as e:
+                    with lock:
+                        errors[page_key] += 1
+                        error_messages.setdefault(page_key, f"{type(e).__name__}: {e}"[:200])
+                    break
+
+    with ResourceSampler() as sampler:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,), name=f"session-{i}") for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+
+    completed = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "sessions": concurrency * rounds,
+        "completed": completed,
+        "errors": sum(errors.values()),
+        "harness_errors": sum(harness_errors.values()),
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(completed / wall, 3) if wall else 0.0,
+        "max_threads": sampler.max_threads,
+        "max_rss_mb": round(sampler.max_rss_mb, 1),
+        "gemini_calls": StubGenerativeModel.calls,
+        "models": router.stats(),
+        "pages": {
+            key: {
+                "n": len(latencies[key]),
+                "errors": errors[key],
+                "first_error": error_messages.get(key),
+                "harness_errors": harness_errors[key],
+                "first_harness_error": harness_messages.get(key),
+                "p50_ms": round(percentile(latencies[key], 50) * 1000, 1),
+                "p99_ms": round(percentile(latencies[key], 99) * 1000, 1),
+            }
+            for key in page_keys
+        },
+    }
+
+
+def print_level(result):
+    print(
+        f"\n[동시 세션 {result['concurrency']:>3}] 완료 {result['completed']}/{result['sessions']} "
+        f"(오류 {result['errors']} · 하네스 오류 {result['harness_errors']}) · 처리량 {result['throughput_per_s']:.2f}/s · "
+        f"최대 스레드 {result['max_threads']} · 최대 RSS {result['max_rss_mb']:.1f} MB · "
+        f"Gemini 호출 {result['gemini_calls']}"
+    )
+    for key, stats in result["pages"].items():
+        print(f"    {key:<8} n={stats['n']:<4} p50={stats['p50_ms']:>9.1f} ms   p99={stats['p99_ms']:>9.1f} ms")
+        if stats["first_error"]:
+            print(f"    {'':<8} 오류 예: {stats['first_error']}")
+        if stats["first_harness_error"]:
+            print(f"    {'':<8} 하네스 오류 예 ({stats['harness_errors']}회, 다시 시도함): {stats['first_harness_error']}")
+    for model in result["models"]:
+        if model["호출 수"]:
+            print(f"    · {model['모델']}: 호출 {model['호출 수']} (오류 {model['오류 수']}) · {model['상태']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 페이지 동시 접속 부하 테스트")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES), help="테스트할 페이지")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8], help="동시 세션 수 단계")
+    parser.add_argument("--rounds", type=int, default=2, help="세션마다 반복할 분석 횟수")
+    parser.add_argument("--name-pool", type=int, default=5, help="페이지마다 사용할 인물 수 (작을수록 캐시 적중 증가)")
+    parser.add_argument("--cold", action="store_true", help="단계마다 캐시를 비우고 시작")
+    parser.add_argument("--source-latency", type=float, default=0.2, help="stub 자료 사이트 평균 응답 시간(초)")
+    parser.add_argument("--source-error-rate", type=float, default=0.0, help="stub 자료 사이트 오류 비율")
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="stub Gemini 평균 응답 시간(초)")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="stub Gemini 오류 비율")
+    parser.add_argument("--timeout", type=float, default=120, help="세션 한 번 실행의 제한 시간(초)")
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+
+    # AppTest 는 실행할 때마다 st.secrets 를 바꿔 끼우므로, 동시 세션끼리 경쟁하지 않도록
+    # 전역 secrets 를 한 번만 설정하고 AppTest 에는 secrets 를 넘기지 않습니다.
+    secrets = Secrets()
+    secrets._secrets = {"GEMINI_API_KEY": "loadtest-stub-key"}
+    st.secrets = secrets
+
+    # AppTest 는 한 번에 한 세션만 돈다고 가정하고 실행마다 전역 상태를 새로 만들고 지웁니다.
+    # 동시 세션이 서로의 상태를 지우지 않도록, 실제 서버처럼 하나의 Runtime 과 스크립트 캐시를 함께 쓰게 합니다.
+    # (실행마다 캐시를 새로 만들면 여러 스레드가 동시에 compile 하여 Python 3.11 에서 SystemError 가 나기도 합니다.)
+    shared_script_cache = ScriptCache()
+    shared_runtime = None
+
+    def _runtime_instance(cls):
+        nonlocal shared_runtime
+        if shared_runtime is None and cls._instance is not None:
+            shared_runtime = cls._instance
+        if shared_runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared_runtime
+
+    results = []
+    with StubSourceServer(args.source_latency, args.source_error_rate) as server, \
+            redirect_requests(server.base_url), \
+            mock.patch("google.generativeai.GenerativeModel", StubGenerativeModel), \
+            mock.patch("google.generativeai.configure"), \
+            mock.patch("streamlit.testing.v1.app_test.ScriptCache", lambda: shared_script_cache), \
+            mock.patch.object(Runtime, "instance", classmethod(_runtime_instance)), \
+            mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)):
+        print(f"stub 자료 서버: {server.base_url} · 페이지: {', '.join(args.pages)}")
+        # 모듈 import 와 스크립트 compile 을 측정 전에 한 번씩 끝내 둡니다.
+        for page_key in args.pages:
+            AppTest.from_file(os.path.join(PAGES_DIR, PAGES[page_key][0]), default_timeout=args.timeout).run()
+        for concurrency in args.concurrency:
+            if args.cold:
+                swr_cache.clear_all()
+            # Gemini 호출 수와 모델별 통계를 같은 단계 범위로 맞춥니다.
+            StubGenerativeModel.configure(args.gemini_latency, args.gemini_error_rate)
+            router.reset_stats()
+            result = run_level(concurrency, args.pages, args.rounds, args.name_pool, args.timeout)
+            print_level(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
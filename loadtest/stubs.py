@@ -0,0 +1,190 @@
+"""
+부하 테스트용 가짜(stub) 외부 서비스
+
+- StubSourceServer: 국사편찬위원회 DB, 위키백과, 한국민족문화대백과(AKS) 세 사이트를 흉내 내는
+  로컬 HTTP 서버입니다. 페이지가 기대하는 CSS 선택자 구조 그대로 HTML 을 돌려줍니다.
+- StubGenerativeModel: genai.GenerativeModel 대신 쓰는 가짜 Gemini 모델로,
+  응답 지연과 오류 비율을 조절할 수 있습니다.
+- redirect_requests: 페이지의 requests.get 호출을 실제 사이트 대신 로컬 서버로 돌립니다.
+"""
+import random
+import re
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+SOURCE_HOSTS = ("db.history.go.kr", "ko.wikipedia.org", "encykorea.aks.ac.kr")
+
+
+def _history_db_html(keyword):
+    items = "".join(
+        f'<li><div class="cont">{keyword} 관련 사료 {i}: 이 인물은 당대 정치 세력과 깊이 관련되어 활동하였다. '
+        f'{"상소와 행적에 대한 기록이 이어진다. " * 20}</div></li>'
+        for i in range(1, 6)
+    )
+    return f'<html><body><div class="search_list"><ul>{items}</ul></div></body></html>'
+
+
+def _wiki_html(title):
+    paragraphs = "".join(
+        f"<p>{title}은(는) 세계사에서 중요한 인물이다. {'생애와 업적에 관한 서술이 이어진다. ' * 30}</p>"
+        for _ in range(8)
+    )
+    return (
+        '<html><body><div class="mw-parser-output">'
+        '<table class="infobox"><tr><td><img src="//upload.wikimedia.org/stub.png"></td></tr></table>'
+        f"{paragraphs}</div></body></html>"
+    )
+
+
+def _aks_search_html(keyword):
+    items = "".join(
+        f'<li><div class="title"><a href="/Article/E{i:07d}">{keyword} ({i})</a></div></li>'
+        for i in range(1, 6)
+    )
+    return f'<html><body><div class="search_list"><ul>{items}</ul></div></body></html>'
+
+
+def _aks_article_html(article_id):
+    body = f"{article_id} 항목 본문. " + "독립운동 단체에 참여하여 활동하였다. " * 120
+    return f'<html><body><div class="content_view">{body}</div></body></html>'
+
+
+class _SourceHandler(BaseHTTPRequestHandler):
+    server_version = "StubSource/1.0"
+
+    def do_GET(self):
+        config = self.server.config
+        if config["latency"]:
+            time.sleep(random.uniform(0.5, 1.5) * config["latency"])
+        if random.random() < config["error_rate"]:
+            self._reply(500, "<html>stub error</html>")
+            return
+
+        parsed = urllib.parse.urlsplit(self.path)
+        host, _, path = parsed.path.lstrip("/").partition("/")
+        path = urllib.parse.unquote("/" + path)
+        query = urllib.parse.parse_qs(parsed.query)
+
+        if host == "db.history.go.kr" and path.startswith("/search/searchResult.do"):
+            self._reply(200, _history_db_html(query.get("searchKeyword", [""])[0]))
+        elif host == "ko.wikipedia.org" and path.startswith("/wiki/"):
+            self._reply(200, _wiki_html(path[len("/wiki/"):]))
+        elif host == "encykorea.aks.ac.kr" and path.startswith("/Article/Search/"):
+            self._reply(200, _aks_search_html(path[len("/Article/Search/"):]))
+        elif host == "encykorea.aks.ac.kr" and path.startswith("/Article/"):
+            self._reply(200, _aks_article_html(path[len("/Article/"):]))
+        else:
+            self._reply(404, "<html>not found</html>")
+
+    def _reply(self, status, html):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSourceServer:
+    """세 자료 사이트를 흉내 내는 로컬 HTTP 서버. with 문으로 시작/종료합니다."""
+
+    def __init__(self, latency=0.05, error_rate=0.0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _SourceHandler)
+        self._server.daemon_threads = True
+        self._server.config = {"latency": latency, "error_rate": error_rate}
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-source", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextmanager
+def redirect_requests(base_url):
+    """실제 자료 사이트로 가는 requests.get 호출을 로컬 stub 서버 주소로 바꿔 보냅니다."""
+    real_get = requests.get
+
+    def _get(url, *args, **kwargs):
+        parts = urllib.parse.urlsplit(url)
+        if parts.hostname in SOURCE_HOSTS:
+            url = urllib.parse.urlunsplit(
+                urllib.parse.urlsplit(base_url)[:2] + (f"/{parts.hostname}{parts.path}", parts.query, "")
+            )
+        return real_get(url, *args, **kwargs)
+
+    with mock.patch("requests.get", _get):
+        yield
+
+
+class _StubUsage:
+    def __init__(self, prompt, text):
+        # 실제 토크나이저 대신 대략적인 글자 수 기반 추정치
+        self.prompt_token_count = len(prompt) // 2
+        self.candidates_token_count = len(text) // 2
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class _StubResponse:
+    def __init__(self, prompt, text):
+        self.text = text
+        self.usage_metadata = _StubUsage(prompt, text)
+
+
+class StubGenerativeModel:
+    """
+    genai.GenerativeModel 대체용 가짜 모델.
+    latency(초)를 중심으로 ±50% 흔들린 시간만큼 기다린 뒤 응답하고, error_rate 비율로 예외를 던집니다.
+    """
+
+    latency = 0.5
+    error_rate = 0.0
+    calls = 0
+    _calls_lock = threading.Lock()
+
+    def __init__(self, model_name="stub", *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, *args, **kwargs):
+        with StubGenerativeModel._calls_lock:
+            StubGenerativeModel.calls += 1
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError("stub Gemini: 429 Resource has been exhausted")
+        # 여러 인물을 묶은 프롬프트(common.batcher)에는 인물별 구역으로 나눠 답합니다.
+        figures = re.findall(r"^\s*### 인물 (\d+): (.+)$", prompt, re.MULTILINE)
+        if figures:
+            text = "\n".join(f"===== 인물 {number}: {name} =====\n{self._answer()}" for number, name in figures)
+        else:
+            text = self._answer()
+        return _StubResponse(prompt, text)
+
+    def _answer(self):
+        return (
+            "결론: 개화파 / 최종 분류: 신진사대부\n"
+            f"### 분석 ({self.model_name})\n"
+            + "- 사료를 바탕으로 한 핵심 근거를 정리합니다.\n" * 15
+        )
+
+    @classmethod
+    def configure(cls, latency, error_rate):
+        cls.latency = latency
+        cls.error_rate = error_rate
+        cls.calls = 0
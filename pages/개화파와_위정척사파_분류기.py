@@ -4,6 +4,15 @@ import requests
 from bs4 import BeautifulSoup
 import re
 
+from common import jobs, profiling
+from common.batcher import get_batcher
+from common.prefetch import prefetch_source
+from common.sources import make_source
+from common.swr_cache import swr_cache
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("개화파")
+
 # ---------------------------------------------------------
 # 1. 페이지 설정
 # ---------------------------------------------------------
@@ -23,8 +32,7 @@ st.info("💡 동일한 인물에 대한 재분석 시 API 호출 없이 캐싱
 try:
     api_key = st.secrets["GEMINI_API_KEY"]
     genai.configure(api_key=api_key)
-    # 모델명은 사용자의 환경에 맞춰 유지합니다.
-    model = genai.GenerativeModel('gemini-2.5-flash-lite') 
+    # 모델은 작업 종류와 입력 길이에 맞춰 라우터가 고릅니다.
 except Exception as e:
     st.error("⚠️ API 키 설정 오류: .streamlit/secrets.toml 파일에 GEMINI_API_KEY가 있는지 확인해주세요.")
     st.stop()
@@ -32,7 +40,7 @@ except Exception as e:
 # ---------------------------------------------------------
 # 3. 기능 함수 정의
 # ---------------------------------------------------------
-@st.cache_data(ttl=3600)
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600)
 def scrape_history_data(name):
     """국사편찬위원회 데이터베이스 검색 (기존 캐싱 유지)"""
     base_url = "https://db.history.go.kr/search/searchResult.do"
@@ -44,32 +52,71 @@ def scrape_history_data(name):
         response = requests.get(base_url, params=params, headers=headers, timeout=5)
         soup = BeautifulSoup(response.text, 'html.parser')
         results = [item.get_text(strip=True) for item in soup.select('.search_list li .cont')[:3]]
-        return " ".join(results) if results else None
+        return make_source(" ".join(results))
     except:
         return None
 
+# 여러 인물을 한 프롬프트로 묶을 때도 인물마다 똑같이 적용되는 출력 규칙
+ANALYSIS_RULES = """1. 첫 번째 줄에 반드시 '결론: 개화파' 또는 '결론: 위정척사파'라고만 적으세요.
+    2. 두 번째 줄부터 핵심 이유와 상세 분석을 마크다운 형식으로 작성하세요."""
+
+# 프롬프트나 출력 규칙을 바꾸면 올려 주세요. 이전 프롬프트로 만든 분석 결과를 캐시에서 다시 쓰지 않습니다.
+PROMPT_VERSION = 1
+
+batcher = get_batcher(
+    "개화파",
+    role="당신은 한국사 전문가입니다. 각 인물이 **'개화파'**인지 **'위정척사파'**인지 판별하세요.",
+    rules=ANALYSIS_RULES,
+    task="classify",
+    validate=lambda text: "결론" in text.split("\n", 1)[0],
+)
+
 # ⭐ API 호출 최적화: 캐싱 데코레이터 추가
-@st.cache_data(ttl=3600, show_spinner=False)
-def analyze_figure(name, context_text):
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda text: not jobs.analysis_failed(text))
+def analyze_figure(name, source_digest, prompt_version, _context_text):
     """
     Gemini AI 분석 결과를 캐싱합니다.
-    이름(name)과 사료(context_text)가 동일하면 API를 호출하지 않고 저장된 결과를 즉시 반환합니다.
+    이름(name)과 사료 digest(source_digest), 프롬프트 버전이 같으면 API를 호출하지 않고 저장된 결과를 즉시 반환합니다.
+    (사료 본문 _context_text 는 캐시 키에 넣지 않습니다.)
+    비슷한 시각에 들어온 다른 인물 요청과는 하나의 프롬프트로 묶어 보냅니다.
     """
+    section = f"[사료 정보]: {_context_text if _context_text else '제공된 사료 없음. 지식을 바탕으로 분석하시오.'}"
     prompt = f"""
     당신은 한국사 전문가입니다. 인물 '{name}'을(를) 분석하여 **'개화파'**인지 **'위정척사파'**인지 판별하세요.
     
-    [사료 정보]: {context_text if context_text else "제공된 사료 없음. 지식을 바탕으로 분석하시오."}
+    {section}
 
     [출력 규칙 - 반드시 지킬 것]
-    1. 첫 번째 줄에 반드시 '결론: 개화파' 또는 '결론: 위정척사파'라고만 적으세요.
-    2. 두 번째 줄부터 핵심 이유와 상세 분석을 마크다운 형식으로 작성하세요.
+    {ANALYSIS_RULES}
     """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return batcher.generate(name, section, prompt)
     except Exception as e:
         return f"결론: 오류\n분석 중 오류 발생: {e}"
 
+# 사료 수집 + AI 분석 (백그라운드 작업으로 실행됩니다)
+run_analysis = jobs.source_analysis(scrape_history_data, analyze_figure, PROMPT_VERSION)
+
+def parse_result(full_result):
+    """첫 줄에서 결론을 추출해 (판정, 상세 분석) 으로 나눕니다."""
+    lines = full_result.strip().split('\n')
+    conclusion_line = lines[0]
+    detailed_analysis = "\n".join(lines[1:])
+
+    actual_faction = ""
+    if "개화파" in conclusion_line:
+        actual_faction = "개화파"
+    elif "위정척사파" in conclusion_line:
+        actual_faction = "위정척사파"
+    return actual_faction, detailed_analysis
+
+def summarize(result):
+    """보관소에 남길 (판정, 자료 출처, 설명) — 캐시가 만료되어도 수업 기록을 다시 볼 수 있도록. Gemini 호출이 실패한 분석은 남기지 않습니다."""
+    if jobs.analysis_failed(result["result"]):
+        return None
+    actual_faction, detailed_analysis = parse_result(result["result"])
+    return actual_faction, "국사편찬위원회" if result["context"] else "AI 지식", detailed_analysis
+
 # ---------------------------------------------------------
 # 4. 화면 구성 (UI) - 초기 정보 섹션 (기존 유지)
 # ---------------------------------------------------------
@@ -98,7 +145,13 @@ st.subheader("🔍 인물 분석 및 예측")
 col1, col2, col3 = st.columns([2, 2, 1])
 
 with col1:
-    target_name = st.text_input("인물 이름을 입력하세요", placeholder="예: 김옥균, 최익현")
+    # 이름이 입력되면 버튼을 누르기 전에 자료 검색을 미리 시작해 캐시를 데워 둡니다.
+    target_name = st.text_input(
+        "인물 이름을 입력하세요", placeholder="예: 김옥균, 최익현",
+        key="개화파_name",
+        on_change=prefetch_source,
+        args=(st.session_state, "개화파", "개화파_name", scrape_history_data),
+    )
 
 with col2:
     user_prediction = st.radio(
@@ -112,27 +165,21 @@ with col3:
     st.write("")
     run_btn = st.button("분석 실행", type="primary", use_container_width=True)
 
+# 버튼을 누르면 분석을 백그라운드 작업으로 맡기고 작업 id 만 세션에 저장합니다.
+# (분석 도중 예측을 바꾸는 등으로 화면이 다시 실행되어도 작업은 버려지지 않고, 끝나는 즉시 보관소에 기록됩니다.)
 if run_btn and target_name:
-    st.divider()
-    
-    # 1. 사료 데이터 수집 (캐싱 적용됨)
-    history_context = scrape_history_data(target_name)
-    
-    # 2. AI 분석 실행 (캐싱 적용됨)
-    # 이미 분석한 인물이라면 로딩 바가 나타나지 않고 즉시 결과가 출력됩니다.
-    with st.spinner(f"🤖 '{target_name}' 분석 중... (새로운 인물은 API를 호출합니다)"):
-        full_result = analyze_figure(target_name, history_context)
-    
-    # 결과 처리 로직 (첫 줄에서 결론 추출)
-    lines = full_result.strip().split('\n')
-    conclusion_line = lines[0]
-    detailed_analysis = "\n".join(lines[1:])
+    jobs.submit_analysis(
+        "개화파", target_name, run_analysis, prediction=user_prediction,
+        archive_page="개화파 vs 위정척사파", summarize=summarize,
+    )
 
-    actual_faction = ""
-    if "개화파" in conclusion_line:
-        actual_faction = "개화파"
-    elif "위정척사파" in conclusion_line:
-        actual_faction = "위정척사파"
+# 이미 분석한 인물이라면 캐시에서 바로 끝나므로 대기 문구 없이 결과가 나옵니다.
+finished = jobs.analysis_result("개화파", "🤖 '{name}' 분석 중... (새로운 인물은 API를 호출합니다)", divider=True)
+if finished:
+    # 결과는 버튼을 누를 때의 이름과 예측을 기준으로 보여 줍니다.
+    target_name, user_prediction, result = finished
+    history_context = result["context"]
+    actual_faction, detailed_analysis = parse_result(result["result"])
 
     st.subheader(f"📊 분석 결과: {target_name}")
 
@@ -147,3 +194,5 @@ if run_btn and target_name:
     if history_context:
         with st.expander("📜 참고 사료 보기"):
             st.text(history_context)
+
+profiling.end()
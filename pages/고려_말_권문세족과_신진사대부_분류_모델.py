@@ -3,6 +3,15 @@ import google.generativeai as genai
 import requests
 from bs4 import BeautifulSoup
 
+from common import jobs, profiling
+from common.batcher import get_batcher
+from common.prefetch import prefetch_source
+from common.sources import make_source
+from common.swr_cache import swr_cache
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("권문세족")
+
 # ---------------------------------------------------------
 # 1. 페이지 설정
 # ---------------------------------------------------------
@@ -18,8 +27,7 @@ st.set_page_config(
 try:
     api_key = st.secrets["GEMINI_API_KEY"]
     genai.configure(api_key=api_key)
-    # 속도가 빠르고 효율적인 flash 모델 사용
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    # 세 갈래 세밀한 분류이므로 flash 등급부터 시작합니다. (상태가 나쁘면 라우터가 더 빠른 모델로 전환)
 except Exception:
     st.error("⚠️ API 키가 설정되지 않았습니다. .streamlit/secrets.toml 파일을 확인해주세요.")
     st.stop()
@@ -28,7 +36,7 @@ except Exception:
 # 3. 데이터 및 기능 함수
 # ---------------------------------------------------------
 
-@st.cache_data(ttl=3600)
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600)
 def scrape_goryeo_data(name):
     """국사편찬위원회 사료 스크래핑 (기존 캐싱 유지)"""
     base_url = "https://db.history.go.kr/search/searchResult.do"
@@ -38,27 +46,65 @@ def scrape_goryeo_data(name):
         response = requests.get(base_url, params=params, headers=headers, timeout=5)
         soup = BeautifulSoup(response.text, 'html.parser')
         results = [item.get_text(strip=True) for item in soup.select('.search_list li .cont')[:3]]
-        return " ".join(results) if results else None
+        return make_source(" ".join(results))
     except: return None
 
+# 여러 인물을 한 프롬프트로 묶을 때도 인물마다 똑같이 적용되는 출력 형식
+ANALYSIS_RULES = "첫 줄에 '최종 분류: [분류명]' 작성 후 아래에 상세 분석 작성."
+
+# 프롬프트나 출력 규칙을 바꾸면 올려 주세요. 이전 프롬프트로 만든 분석 결과를 캐시에서 다시 쓰지 않습니다.
+PROMPT_VERSION = 1
+
+batcher = get_batcher(
+    "권문세족",
+    role="각 인물을 분석하여 '권문세족', '신진사대부', '신흥무인세력' 중 하나로 분류하세요.",
+    rules=ANALYSIS_RULES,
+    task="classify_fine",
+    validate=lambda text: "최종 분류" in text.split("\n", 1)[0],
+)
+
 # ⭐ API 호출 최적화: 캐싱 데코레이터 추가
-@st.cache_data(ttl=3600, show_spinner=False)
-def analyze_goryeo_figure(name, context_text):
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda text: not jobs.analysis_failed(text))
+def analyze_goryeo_figure(name, source_digest, prompt_version, _context_text):
     """
     Gemini API 분석 결과 캐싱.
     동일한 이름과 사료 데이터가 들어오면 API를 호출하지 않고 저장된 값을 반환합니다.
+    비슷한 시각의 다른 인물 요청과는 하나의 프롬프트로 묶어 보냅니다.
     """
+    section = f"[사료]: {_context_text if _context_text else '지식 기반 분석'}"
     prompt = f"""
     인물 '{name}'을 분석하여 '권문세족', '신진사대부', '신흥무인세력' 중 하나로 분류하세요.
-    [사료]: {context_text if context_text else "지식 기반 분석"}
-    [형식]: 첫 줄에 '최종 분류: [분류명]' 작성 후 아래에 상세 분석 작성.
+    {section}
+    [형식]: {ANALYSIS_RULES}
     """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return batcher.generate(name, section, prompt)
     except Exception as e:
         return f"최종 분류: 오류\n{e}"
 
+# 사료 수집 + AI 분석 (백그라운드 작업으로 실행됩니다)
+run_analysis = jobs.source_analysis(scrape_goryeo_data, analyze_goryeo_figure, PROMPT_VERSION)
+
+def parse_result(full_result):
+    """첫 줄에서 결론을 추출해 (판정, 상세 분석) 으로 나눕니다."""
+    lines = full_result.strip().split('\n')
+    conclusion = lines[0]
+    detailed_analysis = "\n".join(lines[1:])
+
+    actual_faction = "기타/미분류"
+    for f in ["권문세족", "신진사대부", "신흥무인세력"]:
+        if f in conclusion:
+            actual_faction = f
+            break
+    return actual_faction, detailed_analysis
+
+def summarize(result):
+    """보관소에 남길 (판정, 자료 출처, 설명). Gemini 호출이 실패한 분석은 남기지 않습니다."""
+    if jobs.analysis_failed(result["result"]):
+        return None
+    actual_faction, detailed_analysis = parse_result(result["result"])
+    return actual_faction, "국사편찬위원회" if result["context"] else "AI 지식", detailed_analysis
+
 # ---------------------------------------------------------
 # 4. UI 구성 (초기 화면 정보 배치)
 # ---------------------------------------------------------
@@ -84,7 +130,13 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     st.markdown("### 🔍 분석 및 예측")
-    target_name = st.text_input("인물 이름을 입력하세요", placeholder="예: 이성계, 정몽주, 이인임")
+    # 이름이 입력되면 버튼을 누르기 전에 자료 검색을 미리 시작해 캐시를 데워 둡니다.
+    target_name = st.text_input(
+        "인물 이름을 입력하세요", placeholder="예: 이성계, 정몽주, 이인임",
+        key="권문세족_name",
+        on_change=prefetch_source,
+        args=(st.session_state, "권문세족", "권문세족_name", scrape_goryeo_data),
+    )
     
     user_prediction = st.radio(
         "본인이 생각하는 이 인물의 소속은?",
@@ -100,28 +152,19 @@ with col1:
         st.warning("**신흥무인세력**: 외세의 침략을 막아내며 성장한 무장 세력으로 신진사대부와 결탁했습니다.")
 
 with col2:
+    # 버튼을 누르면 분석을 백그라운드 작업으로 맡기고 작업 id 만 세션에 저장합니다.
+    # (분석 도중 예측을 바꾸는 등으로 화면이 다시 실행되어도 작업은 버려지지 않고, 끝나는 즉시 보관소에 기록됩니다.)
     if analyze_btn and target_name:
-        st.divider()
-        
-        # 1. 사료 검색 (캐싱됨)
-        with st.status("역사 데이터베이스 검색 중...", expanded=False) as status:
-            history_data = scrape_goryeo_data(target_name)
-            status.update(label="✅ 데이터 확보 완료", state="complete")
-        
-        # 2. AI 분석 실행 (캐싱됨)
-        with st.spinner(f"🤖 '{target_name}' 분석 중... (새로운 인물은 API를 호출합니다)"):
-            full_result = analyze_goryeo_figure(target_name, history_data)
-        
-        # 결과 판정 로직
-        lines = full_result.strip().split('\n')
-        conclusion = lines[0]
-        detailed_analysis = "\n".join(lines[1:])
-        
-        actual_faction = "기타/미분류"
-        for f in ["권문세족", "신진사대부", "신흥무인세력"]:
-            if f in conclusion:
-                actual_faction = f
-                break
+        jobs.submit_analysis(
+            "권문세족", target_name, run_analysis, prediction=user_prediction,
+            archive_page="고려 말 세력 분류기", summarize=summarize,
+        )
+
+    finished = jobs.analysis_result("권문세족", "🤖 '{name}' 사료 검색 및 분석 중... (새로운 인물은 API를 호출합니다)", divider=True)
+    if finished:
+        # 결과는 버튼을 누를 때의 이름과 예측을 기준으로 보여 줍니다.
+        target_name, user_prediction, result = finished
+        actual_faction, detailed_analysis = parse_result(result["result"])
         
         # 피드백 출력
         st.subheader(f"📊 {target_name} 분석 결과")
@@ -129,9 +172,11 @@ with col2:
             st.success(f"🎯 **정답입니다!** '{target_name}'님은 **{actual_faction}** 세력입니다.")
         else:
             st.error(f"🧐 **틀렸습니다.** 예측은 '{user_prediction}'이었어나, 분석 결과는 **{actual_faction}**입니다.")
-        
+
         with st.container(border=True):
             st.markdown(detailed_analysis)
             
-    else:
+    elif not jobs.has_analysis("권문세족"):
         st.info("👈 왼쪽에서 인물 이름을 입력하고 예측 버튼을 눌러보세요!")
+
+profiling.end()
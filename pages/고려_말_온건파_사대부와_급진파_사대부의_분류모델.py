@@ -3,6 +3,15 @@ import google.generativeai as genai
 import requests
 from bs4 import BeautifulSoup
 
+from common import jobs, profiling
+from common.batcher import get_batcher
+from common.prefetch import prefetch_source
+from common.sources import make_source
+from common.swr_cache import swr_cache
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("사대부")
+
 # ---------------------------------------------------------
 # 1. 페이지 설정
 # ---------------------------------------------------------
@@ -27,8 +36,7 @@ try:
     
     if api_key:
         genai.configure(api_key=api_key)
-        # 안정적인 gemini-1.5-flash 모델 사용 권장 (최신 버전 반영)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        # 모델은 작업 종류와 입력 길이에 맞춰 라우터가 고릅니다.
     else:
         st.warning("⚠️ API 키가 설정되지 않았습니다.")
         st.stop()
@@ -39,7 +47,7 @@ except Exception as e:
 # ---------------------------------------------------------
 # 3. 데이터 수집 함수 (기존 캐싱 유지)
 # ---------------------------------------------------------
-@st.cache_data(ttl=3600)
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600)
 def scrape_history_db(name):
     base_url = "https://db.history.go.kr/search/searchResult.do"
     headers = {
@@ -50,37 +58,76 @@ def scrape_history_db(name):
         response = requests.get(base_url, params=params, headers=headers, timeout=5)
         soup = BeautifulSoup(response.text, 'html.parser')
         results = [item.get_text(strip=True) for item in soup.select('.search_list li .cont')[:3]]
-        return " ".join(results) if results else None
+        return make_source(" ".join(results))
     except:
         return None
 
 # ---------------------------------------------------------
 # 4. AI 분석 함수 (Gemini API 캐싱 추가)
 # ---------------------------------------------------------
-# 인물 이름과 사료 내용이 동일하면 함수를 다시 실행하지 않고 캐시된 결과를 반환합니다.
-@st.cache_data(show_spinner=False, ttl=3600)
-def analyze_sadaebu(name, context_text):
-    if context_text:
-        base_prompt = f"다음 [사료]를 바탕으로 인물 '{name}'을 분석하세요.\n[사료]: {context_text[:2500]}"
+# 여러 인물을 한 프롬프트로 묶을 때도 인물마다 똑같이 적용되는 지시사항
+ANALYSIS_RULES = """1. 이 인물이 **'온건파 사대부'**인지 **'급진파 사대부'**인지 명확히 분류하세요.
+    2. **[반드시 지킬 출력 형식]**:
+       - 첫 번째 줄: 반드시 "최종 분류: [분류명]" 형식으로만 작성하세요. (예: 최종 분류: 온건파 사대부)
+       - 두 번째 줄 이하: 왕조에 대한 태도, 토지 개혁, 행적 등을 마크다운 형식으로 상세히 설명하세요."""
+
+# 프롬프트나 출력 규칙을 바꾸면 올려 주세요. 이전 프롬프트로 만든 분석 결과를 캐시에서 다시 쓰지 않습니다.
+PROMPT_VERSION = 1
+
+batcher = get_batcher(
+    "사대부",
+    role="다음 [사료]를 바탕으로 고려 말 각 인물을 분석하세요.",
+    rules=ANALYSIS_RULES,
+    task="classify",
+    validate=lambda text: "최종 분류" in text.split("\n", 1)[0],
+)
+
+# 인물 이름과 사료 digest, 프롬프트 버전이 같으면 함수를 다시 실행하지 않고 캐시된 결과를 반환합니다.
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda text: not jobs.analysis_failed(text))
+def analyze_sadaebu(name, source_digest, prompt_version, _context_text):
+    if _context_text:
+        base_prompt = f"다음 [사료]를 바탕으로 인물 '{name}'을 분석하세요.\n[사료]: {_context_text[:2500]}"
+        section = f"[사료]: {_context_text[:2500]}"
     else:
         base_prompt = f"역사적 지식을 바탕으로 고려 말 인물 '{name}'을 분석하세요."
+        section = "[사료]: 없음. 역사적 지식을 바탕으로 분석하세요."
 
     prompt = f"""
     {base_prompt}
 
     [지시사항]
-    1. 이 인물이 **'온건파 사대부'**인지 **'급진파 사대부'**인지 명확히 분류하세요.
-    2. **[반드시 지킬 출력 형식]**:
-       - 첫 번째 줄: 반드시 "최종 분류: [분류명]" 형식으로만 작성하세요. (예: 최종 분류: 온건파 사대부)
-       - 두 번째 줄 이하: 왕조에 대한 태도, 토지 개혁, 행적 등을 마크다운 형식으로 상세히 설명하세요.
+    {ANALYSIS_RULES}
     """
 
+    # 비슷한 시각의 다른 인물 요청과는 하나의 프롬프트로 묶어 보냅니다.
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return batcher.generate(name, section, prompt)
     except Exception as e:
         return f"최종 분류: 오류\n분석 중 오류 발생: {e}"
 
+# 사료 수집 + AI 분석 (백그라운드 작업으로 실행됩니다)
+run_analysis = jobs.source_analysis(scrape_history_db, analyze_sadaebu, PROMPT_VERSION)
+
+def parse_result(full_result):
+    """첫 줄에서 결론을 추출해 (판정, 상세 분석) 으로 나눕니다."""
+    lines = full_result.strip().split('\n')
+    conclusion_line = lines[0]
+    detailed_analysis = "\n".join(lines[1:])
+
+    actual_faction = "기타"
+    if "온건파" in conclusion_line:
+        actual_faction = "온건파 사대부"
+    elif "급진파" in conclusion_line:
+        actual_faction = "급진파 사대부"
+    return actual_faction, detailed_analysis
+
+def summarize(result):
+    """보관소에 남길 (판정, 자료 출처, 설명). Gemini 호출이 실패한 분석은 남기지 않습니다."""
+    if jobs.analysis_failed(result["result"]):
+        return None
+    actual_faction, detailed_analysis = parse_result(result["result"])
+    return actual_faction, "국사편찬위원회" if result["context"] else "AI 지식", detailed_analysis
+
 # ---------------------------------------------------------
 # 5. UI 구성
 # ---------------------------------------------------------
@@ -99,7 +146,13 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     st.markdown("### 🔍 인물 입력 및 예측")
-    target_name = st.text_input("인물 이름", placeholder="예: 정몽주, 정도전")
+    # 이름이 입력되면 버튼을 누르기 전에 자료 검색을 미리 시작해 캐시를 데워 둡니다.
+    target_name = st.text_input(
+        "인물 이름", placeholder="예: 정몽주, 정도전",
+        key="사대부_name",
+        on_change=prefetch_source,
+        args=(st.session_state, "사대부", "사대부_name", scrape_history_db),
+    )
     
     user_prediction = st.radio(
         "본인이 생각하는 이 인물의 소속은?",
@@ -110,28 +163,21 @@ with col1:
     analyze_btn = st.button("분석 시작", type="primary", use_container_width=True)
 
 with col2:
+    # 버튼을 누르면 분석을 백그라운드 작업으로 맡기고 작업 id 만 세션에 저장합니다.
+    # (분석 도중 예측을 바꾸는 등으로 화면이 다시 실행되어도 작업은 버려지지 않고, 끝나는 즉시 보관소에 기록됩니다.)
     if analyze_btn and target_name:
-        # 1. 데이터 수집 (캐시 적용됨)
-        with st.status("역사 데이터베이스 검색 중...", expanded=False) as status:
-            history_data = scrape_history_db(target_name)
-            status.update(label="✅ 데이터 검색 완료", state="complete")
-        
-        # 2. AI 분석 (캐시 적용됨)
-        # 이미 검색했던 인물이라면 API 호출 없이 즉시 결과가 나타납니다.
-        with st.spinner(f"🤖 '{target_name}'의 성향을 분석 중입니다..."):
-            full_result = analyze_sadaebu(target_name, history_data)
-        
-        # 3. 결과 대조 로직
-        lines = full_result.strip().split('\n')
-        conclusion_line = lines[0]
-        detailed_analysis = "\n".join(lines[1:])
-        
-        actual_faction = "기타"
-        if "온건파" in conclusion_line:
-            actual_faction = "온건파 사대부"
-        elif "급진파" in conclusion_line:
-            actual_faction = "급진파 사대부"
-            
+        jobs.submit_analysis(
+            "사대부", target_name, run_analysis, prediction=user_prediction,
+            archive_page="온건파 vs 급진파 사대부", summarize=summarize,
+        )
+
+    finished = jobs.analysis_result("사대부", "🤖 '{name}'의 성향을 분석 중입니다...")
+    if finished:
+        # 결과는 버튼을 누를 때의 이름과 예측을 기준으로 보여 줍니다.
+        target_name, user_prediction, result = finished
+        history_data = result["context"]
+        actual_faction, detailed_analysis = parse_result(result["result"])
+
         # 4. 결과 출력
         st.subheader(f"📊 분석 결과: {target_name}")
         
@@ -150,5 +196,7 @@ with col2:
 
     elif analyze_btn and not target_name:
         st.error("인물 이름을 입력해주세요.")
-    else:
+    elif not jobs.has_analysis("사대부"):
         st.info("👈 왼쪽에서 인물 이름을 입력하고 소속을 예측한 뒤 '분석 시작'을 눌러주세요.")
+
+profiling.end()
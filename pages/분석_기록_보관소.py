@@ -0,0 +1,117 @@
+import streamlit as st
+from datetime import timedelta
+
+from common import archive, profiling
+from common.model_router import router
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("기록보관소")
+
+# ---------------------------------------------------------
+# 1. 페이지 설정
+# ---------------------------------------------------------
+st.set_page_config(
+    page_title="분석 기록 보관소",
+    page_icon="🗂️",
+    layout="wide"
+)
+
+st.title("🗂️ 분석 기록 보관소")
+st.markdown("---")
+st.info("💡 캐시가 만료된 뒤에도 지금까지의 분석 결과와 학생 예측을 다시 살펴볼 수 있습니다.")
+
+# ---------------------------------------------------------
+# 2. 조회 조건
+# ---------------------------------------------------------
+st.subheader("🔎 조회 조건")
+f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+
+with f_col1:
+    page_options = ["전체"] + archive.distinct("page")
+    page_choice = st.selectbox("수업 도구", page_options)
+
+with f_col2:
+    figure_text = st.text_input("인물 이름 (일부 입력 가능)", placeholder="예: 김구")
+
+with f_col3:
+    correct_choice = st.selectbox("정답 여부", ["전체", "정답", "오답"])
+
+with f_col4:
+    date_range = st.date_input(
+        "기간 (한국 시간 기준)",
+        value=(archive.today() - timedelta(days=30), archive.today()),
+    )
+
+filters = {
+    "page": None if page_choice == "전체" else page_choice,
+    "figure": figure_text.strip() or None,
+    "correct": {"전체": None, "정답": True, "오답": False}[correct_choice],
+}
+# 기간은 시작일만 고른 상태일 수도 있습니다.
+if isinstance(date_range, (tuple, list)) and date_range:
+    filters["start_date"] = date_range[0]
+    filters["end_date"] = date_range[-1]
+
+total = archive.count(**filters)
+st.caption(f"조건에 맞는 기록: 총 {total}건")
+
+st.markdown("---")
+
+# ---------------------------------------------------------
+# 3. 집계
+# ---------------------------------------------------------
+st.subheader("📊 집계")
+group_labels = {"인물별": "figure", "수업 도구별": "page", "판정 결과별": "verdict", "자료 출처별": "source"}
+group_choice = st.radio("집계 기준", list(group_labels), horizontal=True)
+
+summary = archive.aggregate(by=group_labels[group_choice], **filters)
+if summary.empty:
+    st.info("집계할 기록이 없습니다.")
+else:
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+st.markdown("---")
+
+# ---------------------------------------------------------
+# 4. 상세 기록 (페이지 나누기)
+# ---------------------------------------------------------
+st.subheader("📜 상세 기록 (최신순)")
+p_col1, p_col2 = st.columns([1, 3])
+
+with p_col1:
+    page_size = st.selectbox("한 페이지 기록 수", [10, 20, 50], index=1)
+    page_count = max(1, -(-total // page_size))
+    page_no = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1)
+    st.caption(f"{page_no} / {page_count} 페이지")
+
+with p_col2:
+    rows = archive.query(
+        offset=(page_no - 1) * page_size,
+        limit=page_size,
+        columns=["ts", "page", "figure", "verdict", "prediction", "correct", "latency_ms", "source", "explanation"],
+        **filters,
+    )
+    if rows.empty:
+        st.info("표시할 기록이 없습니다.")
+    else:
+        table = rows.drop(columns=["explanation"]).rename(columns={
+            "ts": "시각", "page": "수업 도구", "figure": "인물", "verdict": "판정",
+            "prediction": "학생 예측", "correct": "정답", "latency_ms": "소요(ms)", "source": "자료 출처",
+        })
+        st.dataframe(table, use_container_width=True, hide_index=True)
+
+        for _, row in rows.iterrows():
+            title = f"{row['ts']:%m-%d %H:%M} · {row['page']} · {row['figure']}"
+            with st.expander(f"📝 {title} 분석 내용 보기"):
+                st.markdown(row["explanation"] or "(내용 없음)")
+
+st.markdown("---")
+
+# ---------------------------------------------------------
+# 5. 모델별 호출 통계 (서버가 켜진 뒤부터 누적)
+# ---------------------------------------------------------
+st.subheader("🤖 모델별 호출 통계")
+st.caption("모델 라우터가 기록한 응답 시간·오류율·토큰 사용량입니다. 느려지거나 오류가 잦은 모델은 잠시 건너뜁니다.")
+st.dataframe(router.stats(), use_container_width=True, hide_index=True)
+
+profiling.end()
@@ -4,6 +4,15 @@ import requests
 from bs4 import BeautifulSoup
 import urllib.parse
 
+from common import jobs, profiling
+from common.batcher import get_batcher
+from common.prefetch import prefetch_source
+from common.sources import NO_SOURCE, make_source
+from common.swr_cache import swr_cache
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("세계사")
+
 # ---------------------------------------------------------
 # 1. 페이지 설정
 # ---------------------------------------------------------
@@ -28,7 +37,7 @@ try:
     
     if api_key:
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite') # 안정적인 flash 모델 권장
+        # 모델은 작업 종류와 입력 길이에 맞춰 라우터가 고릅니다.
     else:
         st.warning("⚠️ API 키가 설정되지 않았습니다.")
         st.stop()
@@ -39,7 +48,7 @@ except Exception as e:
 # ---------------------------------------------------------
 # 3. 위키백과 스크래핑 함수 (캐싱 적용됨)
 # ---------------------------------------------------------
-@st.cache_data(ttl=3600)
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda data: data[0] is not None)
 def get_wiki_data(name):
     encoded_name = urllib.parse.quote(name)
     url = f"https://ko.wikipedia.org/wiki/{encoded_name}"
@@ -47,6 +56,7 @@ def get_wiki_data(name):
 
     try:
         response = requests.get(url, headers=headers, timeout=5)
+        if response.status_code == 404: return NO_SOURCE, None  # 그런 문서 없음 (결과 없음으로 캐시)
         if response.status_code != 200: return None, None
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -63,35 +73,67 @@ def get_wiki_data(name):
             img_src = infobox.get('src')
             image_url = "https:" + img_src if img_src.startswith('//') else img_src
 
-        return text_data, image_url
+        return make_source(text_data), image_url
     except: return None, None
 
 # ---------------------------------------------------------
 # 4. AI 분석 함수 (Gemini API 캐싱 추가)
 # ---------------------------------------------------------
-# show_spinner=False로 설정하여 캐시된 데이터를 불러올 때 불필요한 로딩창을 방지합니다.
-@st.cache_data(ttl=3600, show_spinner=False)
-def analyze_wiki_text(name, wiki_text):
+# 여러 인물을 한 프롬프트로 묶을 때도 인물마다 똑같이 적용되는 출력 형식
+ANALYSIS_RULES = "마크다운을 사용하여 한 줄 소개, 기본 정보, 주요 업적(3가지), 역사적 평가, 흥미로운 사실 순으로 작성하세요."
+
+# 프롬프트나 출력 규칙을 바꾸면 올려 주세요. 이전 프롬프트로 만든 분석 결과를 캐시에서 다시 쓰지 않습니다.
+PROMPT_VERSION = 1
+
+batcher = get_batcher(
+    "세계사",
+    role="당신은 세계사 전문 역사 선생님입니다. 아래 [위키백과 텍스트]를 바탕으로 각 인물에 대해 학생들에게 설명하듯 정리해주세요.",
+    rules=ANALYSIS_RULES,
+    task="summarize",
+    validate=lambda text: len(text.strip()) > 100,
+)
+
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda text: not jobs.analysis_failed(text))
+def analyze_wiki_text(name, source_digest, prompt_version, _wiki_text):
     """
-    인물 이름과 위키 텍스트가 이전 요청과 동일하면 API 호출 없이 결과를 반환합니다.
+    인물 이름과 위키 텍스트 digest, 프롬프트 버전이 이전 요청과 같으면 API 호출 없이 결과를 반환합니다.
+    비슷한 시각의 다른 인물 요청과는 하나의 프롬프트로 묶어 보냅니다.
     """
+    section = f"""[위키백과 텍스트]
+    {_wiki_text}"""
     prompt = f"""
     당신은 세계사 전문 역사 선생님입니다. 
     아래 [위키백과 텍스트]를 바탕으로 인물 '{name}'에 대해 학생들에게 설명하듯 정리해주세요.
 
-    [위키백과 텍스트]
-    {wiki_text}
+    {section}
 
     [출력 형식]
-    마크다운을 사용하여 한 줄 소개, 기본 정보, 주요 업적(3가지), 역사적 평가, 흥미로운 사실 순으로 작성하세요.
+    {ANALYSIS_RULES}
     """
 
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return batcher.generate(name, section, prompt)
     except Exception as e:
         return f"분석 중 오류 발생: {e}"
 
+def run_search(name):
+    """위키 데이터 수집 + AI 정리 (백그라운드 작업으로 실행됩니다)"""
+    source, img_url = get_wiki_data(name)
+    # 문서를 찾지 못하면 Gemini 를 호출하지 않습니다.
+    found = source is not None and source.text
+    result_text = analyze_wiki_text(name, source.digest, PROMPT_VERSION, source.text) if found else None
+    return {
+        "wiki_text": source.text if found else None,
+        "img_url": img_url,
+        "result": result_text,
+    }
+
+def summarize(result):
+    """보관소에 남길 (판정, 자료 출처, 설명) — 예측/판정이 없는 요약형 분석, 문서를 찾지 못했거나 정리에 실패하면 남기지 않습니다."""
+    if not result["wiki_text"] or jobs.analysis_failed(result["result"]):
+        return None
+    return None, "위키백과", result["result"]
+
 # ---------------------------------------------------------
 # 5. UI 구성
 # ---------------------------------------------------------
@@ -99,16 +141,27 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     st.markdown("### 🔍 인물 검색")
-    target_name = st.text_input("인물 이름", placeholder="예: 나폴레옹, 칭기즈 칸")
+    # 이름이 입력되면 버튼을 누르기 전에 자료 검색을 미리 시작해 캐시를 데워 둡니다.
+    target_name = st.text_input(
+        "인물 이름", placeholder="예: 나폴레옹, 칭기즈 칸",
+        key="세계사_name",
+        on_change=prefetch_source,
+        args=(st.session_state, "세계사", "세계사_name", get_wiki_data),
+    )
     search_btn = st.button("검색 및 분석 시작", type="primary", use_container_width=True)
 
 with col2:
+    # 버튼을 누르면 검색/정리를 백그라운드 작업으로 맡기고 작업 id 만 세션에 저장합니다.
+    # (작업 도중 화면이 다시 실행되어도 작업은 버려지지 않고, 끝나는 즉시 보관소에 기록됩니다.)
     if search_btn and target_name:
-        st.divider()
-        
-        # 위키 데이터 수집 (캐시 적용)
-        with st.status(f"🌐 데이터 찾는 중...", expanded=False):
-            wiki_text, img_url = get_wiki_data(target_name)
+        jobs.submit_analysis("세계사", target_name, run_search, archive_page="세계사 인물 검색기", summarize=summarize)
+
+    finished = jobs.analysis_result(
+        "세계사", "🌐 '{name}' 데이터를 찾고 🤖 Gemini가 내용을 정리 중입니다...", divider=True
+    )
+    if finished:
+        target_name, _, result = finished
+        wiki_text, img_url, result_text = result["wiki_text"], result["img_url"], result["result"]
         
         if not wiki_text:
             st.error("문서를 찾을 수 없습니다. 이름을 확인해주세요.")
@@ -118,10 +171,6 @@ with col2:
         
         # 레이아웃 배치
         img_col, text_col = st.columns([1, 2])
-        
-        # AI 분석 실행 (캐시 적용)
-        with st.spinner("🤖 Gemini가 내용을 정리 중입니다..."):
-            result_text = analyze_wiki_text(target_name, wiki_text)
             
         if img_url:
             with img_col:
@@ -133,3 +182,5 @@ with col2:
 
         with st.expander("📚 출처 및 원문 보기"):
             st.text(wiki_text[:500] + "...")
+
+profiling.end()
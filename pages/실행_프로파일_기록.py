@@ -0,0 +1,75 @@
+import streamlit as st
+
+from common import profiling
+
+# ---------------------------------------------------------
+# 1. 페이지 설정
+# ---------------------------------------------------------
+st.set_page_config(
+    page_title="실행 프로파일 기록",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+st.title("⏱️ 실행 프로파일 기록 (관리자용)")
+st.markdown("---")
+
+# 기록에는 다른 사용자의 실행 내용이 들어 있으므로 운영자 세션에서만 보여 줍니다.
+if not profiling.is_operator():
+    st.error("🔒 운영자만 볼 수 있는 페이지입니다.")
+    st.stop()
+
+st.info(
+    "💡 페이지가 느릴 때 시간이 어디에 쓰였는지 확인합니다. "
+    f"서버 환경 변수 `{profiling.PROFILE_ENV}=1` 로 모든 실행을, 주소 뒤에 `?profile=1` 을 붙이면 그 세션의 실행만 기록합니다. "
+    f"가장 느렸던 {profiling.KEEP_SLOWEST}개 실행만 보관합니다."
+)
+
+# ---------------------------------------------------------
+# 2. 현재 상태
+# ---------------------------------------------------------
+if profiling.is_enabled():
+    st.success("🟢 이 세션에서 프로파일링이 켜져 있습니다. 다른 페이지를 사용한 뒤 이곳으로 돌아오세요.")
+else:
+    st.warning("⚪ 이 세션에서는 프로파일링이 꺼져 있습니다.")
+
+runs = profiling.list_runs()
+if not runs:
+    st.info("보관된 실행 기록이 없습니다.")
+    st.stop()
+
+# ---------------------------------------------------------
+# 3. 느린 실행 목록
+# ---------------------------------------------------------
+st.subheader("🐢 느린 실행 목록 (느린 순)")
+st.dataframe(
+    [
+        {
+            "시각": r["started_at"], "페이지": r["page"], "소요(ms)": r["duration_ms"], "샘플 수": r["samples"],
+            "제출한 실행": r.get("parent") or "",
+        }
+        for r in runs
+    ],
+    use_container_width=True,
+    hide_index=True,
+)
+
+st.caption(
+    ".prof 파일은 `python -m pstats` 나 snakeviz 로, .folded 파일은 speedscope 나 flamegraph.pl 로 열어 볼 수 있습니다. "
+    "'분석 작업' 기록은 페이지 실행이 맡긴 백그라운드 분석을 작업 스레드에서 따로 기록한 것입니다."
+)
+
+for r in runs:
+    with st.expander(f"📄 {r['started_at']} · {r['page']} · {r['duration_ms']:.0f} ms"):
+        if r.get("parent"):
+            st.caption(f"제출한 실행: {r['parent']}")
+        st.text(r["summary"])
+        d_col1, d_col2, d_col3 = st.columns(3)
+        for col, suffix, label in ((d_col1, ".prof", "cProfile (.prof)"), (d_col2, ".folded", "Flame graph (.folded)")):
+            path = profiling.run_file(r["id"], suffix)
+            if path:
+                with open(path, "rb") as f:
+                    col.download_button(f"⬇️ {label}", f.read(), file_name=r["id"] + suffix, key=r["id"] + suffix)
+        if d_col3.button("🗑️ 삭제", key=r["id"] + "_delete"):
+            profiling.delete_run(r["id"])
+            st.rerun()
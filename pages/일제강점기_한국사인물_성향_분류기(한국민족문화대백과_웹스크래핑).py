@@ -4,6 +4,15 @@ import requests
 from bs4 import BeautifulSoup
 import urllib.parse
 
+from common import jobs, profiling
+from common.batcher import get_batcher
+from common.prefetch import prefetch_all, prefetch_source
+from common.sources import NO_SOURCE, make_source
+from common.swr_cache import swr_cache
+
+# 프로파일링 모드가 켜져 있으면 이번 실행을 기록합니다. (실행 프로파일 기록 페이지에서 확인)
+profiling.begin("일제강점기")
+
 # ---------------------------------------------------------
 # 1. 페이지 설정
 # ---------------------------------------------------------
@@ -28,8 +37,7 @@ try:
     
     if api_key:
         genai.configure(api_key=api_key)
-        # 안정적인 분석을 위해 1.5 Flash 모델 권장 (2.5-flash-lite는 최신 실험 모델일 수 있음)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        # 모델은 작업 종류와 입력 길이에 맞춰 라우터가 고릅니다.
     else:
         st.warning("⚠️ API 키가 설정되지 않았습니다.")
         st.stop()
@@ -40,68 +48,120 @@ except Exception as e:
 # ---------------------------------------------------------
 # 3. 데이터 수집 함수 (상세 페이지 크롤링 개선)
 # ---------------------------------------------------------
-@st.cache_data(ttl=3600)
-def scrape_aks_data(name):
-    """검색 결과 리스트에서 첫 번째 항목의 상세 내용을 가져옵니다."""
+AKS_BASE_URL = "https://encykorea.aks.ac.kr"
+AKS_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+# 검색 결과에서 미리 가져올 상위 후보 문서 수
+AKS_TOP_K = 3
+
+# 1단계 캐시: 검색어 → 상위 후보 문서 주소 (검색 결과는 비교적 자주 바뀔 수 있어 짧게 보관)
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600)
+def search_aks_articles(name):
+    """검색 결과 리스트에서 상위 AKS_TOP_K 개 항목의 상세 페이지 주소를 가져옵니다."""
     encoded_name = urllib.parse.quote(name)
-    search_url = f"https://encykorea.aks.ac.kr/Article/Search/{encoded_name}"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-    
+    search_url = f"{AKS_BASE_URL}/Article/Search/{encoded_name}"
     try:
-        # 1. 검색 결과 페이지 요청
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = requests.get(search_url, headers=AKS_HEADERS, timeout=10)
         soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 2. 검색 결과 목록에서 첫 번째 제목의 링크 찾기
         # 한국학중앙연구원(AKS)의 검색 결과 리스트 내 제목 링크 선택자
-        first_item = soup.select_one('.search_list li .title a')
-        
-        if first_item and 'href' in first_item.attrs:
-            detail_url = "https://encykorea.aks.ac.kr" + first_item['href']
-            
-            # 3. 상세 페이지 요청
-            detail_res = requests.get(detail_url, headers=headers, timeout=10)
-            detail_soup = BeautifulSoup(detail_res.text, 'html.parser')
-            
-            # 4. 상세 본문 텍스트 추출 (content_view 클래스나 article 태그 등)
-            content_area = detail_soup.find('div', {'class': 'content_view'}) or detail_soup.find('article') or detail_soup.body
-            return content_area.get_text(strip=True)[:4000]
-        
+        items = soup.select('.search_list li .title a')
+        return [AKS_BASE_URL + item['href'] for item in items if 'href' in item.attrs][:AKS_TOP_K]
+    except Exception as e:
         return None
+
+# 2단계 캐시: 문서 주소 → 본문 텍스트 (백과사전 본문은 거의 바뀌지 않으므로 길게 보관하고, 여러 검색어가 함께 씁니다)
+@swr_cache(soft_ttl=24 * 3600, hard_ttl=7 * 24 * 3600, max_entries=500)
+def fetch_aks_article(detail_url):
+    """상세 페이지에서 본문 텍스트를 추출합니다."""
+    try:
+        detail_res = requests.get(detail_url, headers=AKS_HEADERS, timeout=10)
+        detail_soup = BeautifulSoup(detail_res.text, 'html.parser')
+        # 상세 본문 텍스트 추출 (content_view 클래스나 article 태그 등)
+        content_area = detail_soup.find('div', {'class': 'content_view'}) or detail_soup.find('article') or detail_soup.body
+        return make_source(content_area.get_text(strip=True)[:4000])
     except Exception as e:
         return None
 
+def scrape_aks_data(name):
+    """검색 결과의 첫 번째 항목 자료(본문 + digest)를 돌려줍니다. (두 단계 캐시를 이어 씁니다)"""
+    article_urls = search_aks_articles(name)
+    if article_urls is None:
+        return None  # 검색 요청 실패
+    if not article_urls:
+        return NO_SOURCE  # 검색 결과 없음
+    # 나머지 후보 문서는 동시에 미리 가져와 둡니다. (이름을 고쳐 다시 검색하거나 다른 학생이 같은 문서를 볼 때 재사용)
+    prefetch_all(fetch_aks_article, article_urls[1:])
+    return fetch_aks_article(article_urls[0])
+
 # ---------------------------------------------------------
 # 4. AI 분석 함수 (프롬프트 강화)
 # ---------------------------------------------------------
-@st.cache_data(show_spinner=False, ttl=3600)
-def analyze_independence_activist(name, context_text):
+# 여러 인물을 한 프롬프트로 묶을 때도 인물마다 똑같이 적용되는 분류 기준과 출력 규칙
+ANALYSIS_RULES = """[분류 기준]: 무장투쟁론, 외교독립론, 실력양성론, 의열투쟁, 친일파, 기타
+    [출력 규칙]:
+    1. 첫 번째 줄은 반드시 '최종 분류: [분류명]' 형식으로 시작하세요.
+    2. 두 번째 줄부터는 해당 인물의 주요 활동, 소속 단체, 독립운동 노선의 특징을 상세히 설명하세요.
+    3. 인물의 변절이나 논란이 있는 경우 객관적인 역사적 사실을 바탕으로 서술하세요.
+    4. 마크다운 형식을 사용하여 가독성 있게 작성하세요."""
+
+# 프롬프트나 출력 규칙을 바꾸면 올려 주세요. 이전 프롬프트로 만든 분석 결과를 캐시에서 다시 쓰지 않습니다.
+PROMPT_VERSION = 1
+
+batcher = get_batcher(
+    "일제강점기",
+    role="제공된 자료를 우선 참고하고, 부족하면 알고 있는 역사적 사실을 더해 일제강점기 각 인물의 독립운동 노선을 분석하세요.",
+    rules=ANALYSIS_RULES,
+    task="classify",
+    validate=lambda text: "최종 분류" in text.split("\n", 1)[0],
+)
+
+@swr_cache(soft_ttl=3600, hard_ttl=6 * 3600, validate=lambda text: not jobs.analysis_failed(text))
+def analyze_independence_activist(name, source_digest, prompt_version, _context_text):
     """자료가 부실할 경우 AI의 지식을 병합하여 분석"""
     
     # 자료 존재 여부에 따른 베이스 프롬프트 설정
-    if context_text and len(context_text) > 300:
-        base_prompt = f"다음 [제공된 자료]를 우선적으로 참고하여 인물 '{name}'을 분석하세요. 만약 자료에 내용이 부족하다면 당신이 알고 있는 역사적 사실을 추가하여 답변하세요.\n\n[제공된 자료]:\n{context_text}"
+    if _context_text and len(_context_text) > 300:
+        base_prompt = f"다음 [제공된 자료]를 우선적으로 참고하여 인물 '{name}'을 분석하세요. 만약 자료에 내용이 부족하다면 당신이 알고 있는 역사적 사실을 추가하여 답변하세요.\n\n[제공된 자료]:\n{_context_text}"
+        section = f"[제공된 자료]:\n{_context_text}"
     else:
         base_prompt = f"당신의 역사적 전문 지식을 바탕으로 일제강점기 인물 '{name}'의 독립운동 노선과 생애를 분석하세요."
+        section = "[제공된 자료]: 없음. 역사적 전문 지식을 바탕으로 독립운동 노선과 생애를 분석하세요."
 
     prompt = f"""
     {base_prompt}
 
     ---
-    [분류 기준]: 무장투쟁론, 외교독립론, 실력양성론, 의열투쟁, 친일파, 기타
-    [출력 규칙]:
-    1. 첫 번째 줄은 반드시 '최종 분류: [분류명]' 형식으로 시작하세요.
-    2. 두 번째 줄부터는 해당 인물의 주요 활동, 소속 단체, 독립운동 노선의 특징을 상세히 설명하세요.
-    3. 인물의 변절이나 논란이 있는 경우 객관적인 역사적 사실을 바탕으로 서술하세요.
-    4. 마크다운 형식을 사용하여 가독성 있게 작성하세요.
+    {ANALYSIS_RULES}
     """
     
+    # 비슷한 시각의 다른 인물 요청과는 하나의 프롬프트로 묶어 보냅니다.
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return batcher.generate(name, section, prompt)
     except Exception as e:
         return f"최종 분류: 오류\n오류 내용: {e}"
 
+# 사료 수집 + AI 분석 (백그라운드 작업으로 실행됩니다)
+run_analysis = jobs.source_analysis(scrape_aks_data, analyze_independence_activist, PROMPT_VERSION)
+
+def parse_result(full_result):
+    """첫 줄에서 분류명을 유연하게 매칭해 (판정, 상세 분석) 으로 나눕니다."""
+    lines = full_result.strip().split('\n')
+    conclusion_line = lines[0]
+    detailed_analysis = "\n".join(lines[1:])
+
+    actual_faction = "기타"
+    for faction in ["무장투쟁론", "외교독립론", "실력양성론", "의열투쟁", "친일파"]:
+        if faction in conclusion_line:
+            actual_faction = faction
+            break
+    return actual_faction, detailed_analysis
+
+def summarize(result):
+    """보관소에 남길 (판정, 자료 출처, 설명). Gemini 호출이 실패한 분석은 남기지 않습니다."""
+    if jobs.analysis_failed(result["result"]):
+        return None
+    actual_faction, detailed_analysis = parse_result(result["result"])
+    return actual_faction, "한국학중앙연구원(AKS)" if result["context"] else "AI 지식", detailed_analysis
+
 # ---------------------------------------------------------
 # 5. UI 구성 및 로직
 # ---------------------------------------------------------
@@ -109,7 +169,13 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     st.markdown("### 🔍 인물 입력 및 예측")
-    target_name = st.text_input("인물 이름", placeholder="예: 안중근, 김구, 이광수")
+    # 이름이 입력되면 버튼을 누르기 전에 자료 검색을 미리 시작해 캐시를 데워 둡니다.
+    target_name = st.text_input(
+        "인물 이름", placeholder="예: 안중근, 김구, 이광수",
+        key="일제강점기_name",
+        on_change=prefetch_source,
+        args=(st.session_state, "일제강점기", "일제강점기_name", scrape_aks_data),
+    )
     user_prediction = st.selectbox(
         "본인이 생각하는 이 인물의 주된 노선은?",
         ["무장투쟁론", "외교독립론", "실력양성론", "의열투쟁", "친일파", "기타"]
@@ -117,27 +183,23 @@ with col1:
     analyze_btn = st.button("분석 시작", type="primary", use_container_width=True)
 
 with col2:
+    # 버튼을 누르면 분석을 백그라운드 작업으로 맡기고 작업 id 만 세션에 저장합니다.
+    # (분석 도중 예측을 바꾸는 등으로 화면이 다시 실행되어도 작업은 버려지지 않고, 끝나는 즉시 보관소에 기록됩니다.)
     if analyze_btn and target_name:
-        # 데이터 수집
-        with st.spinner(f"🌐 외부 자료(AKS)에서 '{target_name}' 정보를 찾는 중..."):
-            history_data = scrape_aks_data(target_name)
-        
-        # AI 분석
-        with st.spinner(f"🤖 AI 분석 중... (새로운 인물일 경우 API를 호출합니다)"):
-            full_result = analyze_independence_activist(target_name, history_data)
-        
-        # 결과 대조 및 파싱
-        lines = full_result.strip().split('\n')
-        conclusion_line = lines[0]
-        detailed_analysis = "\n".join(lines[1:])
-        
-        # 분류명 추출 (유연하게 매칭)
-        actual_faction = "기타"
-        for faction in ["무장투쟁론", "외교독립론", "실력양성론", "의열투쟁", "친일파"]:
-            if faction in conclusion_line:
-                actual_faction = faction
-                break
-            
+        jobs.submit_analysis(
+            "일제강점기", target_name, run_analysis, prediction=user_prediction,
+            archive_page="일제강점기 인물 성향 분류기", summarize=summarize,
+        )
+
+    finished = jobs.analysis_result(
+        "일제강점기", "🌐 '{name}' 외부 자료(AKS) 검색 및 🤖 AI 분석 중... (새로운 인물일 경우 API를 호출합니다)"
+    )
+    if finished:
+        # 결과는 버튼을 누를 때의 이름과 예측을 기준으로 보여 줍니다.
+        target_name, user_prediction, result = finished
+        history_data = result["context"]
+        actual_faction, detailed_analysis = parse_result(result["result"])
+
         st.subheader(f"📊 분석 결과: {target_name}")
         
         # 정답 여부 확인 UI
@@ -155,3 +217,5 @@ with col2:
             st.caption("📍 출처: 한국학중앙연구원(AKS) 한국민족문화대백과사전 자료 기반 분석")
         else:
             st.caption("📍 출처: AI 내부 학습 데이터 기반 분석 (외부 자료 검색 실패)")
+
+profiling.end()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 저장소 루트를 import 경로에 넣어 common 패키지를 바로 불러올 수 있게 합니다.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,160 @@
+"""일제강점기 페이지의 AKS 두 단계 캐시(검색어 → 문서 주소, 문서 주소 → 본문) 테스트
+
+인물 이름을 입력하면 미리 가져오기(prefetch)가 페이지의 scrape_aks_data 를 실행하므로,
+Gemini 를 부르지 않고 자료 사이트에 간 요청만 세어 캐시 동작을 확인합니다.
+"""
+import os
+import threading
+import time
+import urllib.parse
+from collections import Counter
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from common import prefetch, swr_cache
+
+PAGE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages",
+    "일제강점기_한국사인물_성향_분류기(한국민족문화대백과_웹스크래핑).py",
+)
+
+# 검색어 → 검색 결과에 나오는 문서 id (같은 인물의 다른 이름은 같은 문서를 가리킵니다)
+SEARCH_RESULTS = {
+    "안중근": ["E1", "E2", "E3"],
+    "안응칠": ["E1", "E2", "E4"],
+    "없는인물": [],
+}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeAKS:
+    """requests.get 대신 AKS 검색/본문 HTML 을 돌려주고, 요청한 주소를 세는 가짜 사이트"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.failing = set()
+
+    def get(self, url, *args, **kwargs):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+        with self.lock:
+            self.requests[path] += 1
+        if path in self.failing:
+            raise ConnectionError("요청 실패")
+        if path.startswith("/Article/Search/"):
+            ids = SEARCH_RESULTS[path[len("/Article/Search/"):]]
+            items = "".join(f'<li><div class="title"><a href="/Article/{i}">{i}</a></div></li>' for i in ids)
+            return FakeResponse(f'<div class="search_list"><ul>{items}</ul></div>')
+        article_id = path[len("/Article/"):]
+        return FakeResponse(f'<div class="content_view">{article_id} 본문. {"독립운동 기록. " * 50}</div>')
+
+    def count(self, path):
+        with self.lock:
+            return self.requests[path]
+
+    def total(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+
+@pytest.fixture
+def aks(monkeypatch):
+    fake = FakeAKS()
+    monkeypatch.setattr("requests.get", fake.get)
+    monkeypatch.setattr("google.generativeai.configure", lambda **kwargs: None)
+    monkeypatch.setattr(prefetch, "DEBOUNCE_SECONDS", 0.01)
+    swr_cache.clear_all()
+    yield fake
+    swr_cache.clear_all()
+
+
+def _type_name(monkeypatch, name):
+    """새 세션에서 페이지를 열고 이름을 입력한 뒤, 미리 가져오기가 끝날 때까지 기다립니다."""
+    # 세션마다 새 작업기를 써서 '최근에 가져온 이름 건너뛰기' 대신 캐시가 요청을 막는지 봅니다.
+    fresh = prefetch.Prefetcher()
+    monkeypatch.setattr(prefetch, "prefetcher", fresh)
+    at = AppTest.from_file(PAGE)
+    at.secrets["GEMINI_API_KEY"] = "test-key"
+    at.run()
+    at.text_input[0].input(name).run()
+    assert not at.exception
+    deadline = time.monotonic() + 5
+    while (fresh._timers or fresh._inflight) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _settle(aks, expected_total, timeout=5.0):
+    """후보 문서 미리 가져오기(prefetch_all)까지 끝나 요청 수가 더 늘지 않을 때까지 기다립니다."""
+    deadline = time.monotonic() + timeout
+    while aks.total() < expected_total and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+
+def test_first_search_fetches_the_top_articles_once(aks, monkeypatch):
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 4)
+    assert aks.requests == Counter({
+        "/Article/Search/안중근": 1, "/Article/E1": 1, "/Article/E2": 1, "/Article/E3": 1,
+    })
+
+    # 같은 이름은 두 단계 모두 캐시에서 나옵니다.
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 5, timeout=0.2)
+    assert aks.total() == 4
+
+
+def test_article_bodies_are_shared_between_search_terms(aks, monkeypatch):
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 4)
+    _type_name(monkeypatch, "안응칠")
+    _settle(aks, 6)
+    # 검색은 새로 하지만 이미 가져온 문서(E1, E2)는 다시 요청하지 않습니다.
+    assert aks.count("/Article/Search/안응칠") == 1
+    assert aks.count("/Article/E4") == 1
+    assert aks.count("/Article/E1") == 1 and aks.count("/Article/E2") == 1
+    assert aks.total() == 6
+
+
+def test_search_without_results_is_cached(aks, monkeypatch):
+    _type_name(monkeypatch, "없는인물")
+    _type_name(monkeypatch, "없는인물")
+    _settle(aks, 2, timeout=0.2)
+    assert aks.requests == Counter({"/Article/Search/없는인물": 1})
+
+
+class OffsetClock:
+    """swr_cache 모듈이 보는 시계를 실제 시간보다 앞으로 돌릴 수 있게 합니다."""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def monotonic(self):
+        return time.monotonic() + self.offset
+
+
+def test_failed_article_request_is_retried_after_the_negative_ttl(aks, monkeypatch):
+    clock = OffsetClock()
+    monkeypatch.setattr(swr_cache, "time", clock)
+    aks.failing.add("/Article/E1")
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 4)
+    assert aks.count("/Article/E1") == 1
+
+    # 실패한 본문은 negative_ttl 동안만 보관되므로, 그 안에는 다시 요청하지 않습니다.
+    aks.failing.clear()
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 5, timeout=0.2)
+    assert aks.count("/Article/E1") == 1
+
+    # negative_ttl 이 지나면 본문만 다시 가져오고, 검색 결과는 그대로 씁니다.
+    clock.offset += 61
+    _type_name(monkeypatch, "안중근")
+    _settle(aks, 5)
+    assert aks.count("/Article/E1") == 2
+    assert aks.count("/Article/Search/안중근") == 1
@@ -0,0 +1,115 @@
+"""archive 조회의 최신순 페이지 나누기(여러 파일·날짜 폴더에 걸친 경우), 필터, 날짜 구분 테스트"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from common import archive
+
+
+class FakeDatetime(datetime):
+    """archive 모듈이 보는 datetime.now 를 직접 움직일 수 있는 가짜 시계 (UTC 기준)"""
+
+    current = datetime(2024, 3, 1, 1, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current.astimezone(tz) if tz else cls.current.replace(tzinfo=None)
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(archive, "datetime", FakeDatetime)
+    monkeypatch.setattr(FakeDatetime, "current", FakeDatetime.current)
+    monkeypatch.setattr(archive, "_buffer", [])
+    # 파일로 내보내는 시점은 테스트가 flush() 로 직접 정합니다.
+    monkeypatch.setattr(archive, "FLUSH_MAX_RECORDS", 10_000)
+    monkeypatch.setattr(archive, "FLUSH_MAX_SECONDS", 10_000)
+    return tmp_path
+
+
+def _record(figure, page="개화파", verdict="개화파", prediction=None, minutes=1):
+    FakeDatetime.current += timedelta(minutes=minutes)
+    archive.record_analysis(page, figure, verdict, prediction, 100, "stub")
+
+
+def _parts(root):
+    return sorted(
+        os.path.join(d, f) for d, _, files in os.walk(root) for f in files if f.endswith(".parquet")
+    )
+
+
+def _write_fragments(sizes):
+    """sizes 의 개수만큼 파일을 만들고, 기록된 인물 이름을 오래된 순서로 돌려줍니다."""
+    figures = []
+    for size in sizes:
+        for _ in range(size):
+            figures.append(f"인물{len(figures):02d}")
+            _record(figures[-1])
+        archive.flush()
+    return figures
+
+
+def test_pages_walk_across_fragments_newest_first(store):
+    figures = _write_fragments([5, 3, 7])
+    assert len(_parts(store)) == 3
+    newest_first = figures[::-1]
+
+    for offset in range(len(figures) + 2):
+        for limit in (1, 4, 6, 20):
+            page = archive.query(offset=offset, limit=limit)
+            assert list(page["figure"]) == newest_first[offset:offset + limit], (offset, limit)
+
+
+def test_pages_cover_every_record_exactly_once(store):
+    figures = _write_fragments([4, 4, 4])
+    seen = []
+    for offset in range(0, len(figures), 5):
+        seen.extend(archive.query(offset=offset, limit=5)["figure"])
+    assert seen == figures[::-1]
+
+
+def test_filters_apply_to_query_count_and_pagination(store):
+    _record("김옥균", verdict="개화파", prediction="개화파")
+    _record("최익현", verdict="위정척사파", prediction="개화파")
+    archive.flush()
+    _record("김홍집", verdict="개화파", prediction="위정척사파")
+    _record("이성계", page="권문세족", verdict="신진사대부")
+    _record("김구", verdict="개화파", prediction="개화파")
+    archive.flush()
+
+    assert archive.count(page="개화파") == 4
+    assert list(archive.query(page="개화파", verdict="개화파")["figure"]) == ["김구", "김홍집", "김옥균"]
+    assert list(archive.query(correct=True)["figure"]) == ["김구", "김옥균"]
+    assert archive.count(correct=False) == 2
+    assert list(archive.query(figure="김")["figure"]) == ["김구", "김홍집", "김옥균"]
+    # 필터가 걸린 상태에서도 offset 은 조건에 맞는 기록 기준으로 셉니다.
+    assert list(archive.query(offset=1, limit=1, figure="김")["figure"]) == ["김홍집"]
+    assert archive.distinct("page") == ["개화파", "권문세족"]
+
+
+def test_dates_follow_kst_partitions(store):
+    # 2024-03-01 14:59 UTC = 23:59 KST, 15:01 UTC = 다음 날 00:01 KST
+    FakeDatetime.current = datetime(2024, 3, 1, 14, 58, tzinfo=timezone.utc)
+    _record("전날 밤")
+    _record("자정 직후", minutes=2)
+    archive.flush()
+
+    assert sorted(os.listdir(store)) == ["date=2024-03-01", "date=2024-03-02"]
+    assert archive.today().isoformat() == "2024-03-02"
+    assert list(archive.query()["figure"]) == ["자정 직후", "전날 밤"]
+    assert list(archive.query(start_date="2024-03-02")["figure"]) == ["자정 직후"]
+    assert list(archive.query(end_date="2024-03-01")["figure"]) == ["전날 밤"]
+    assert archive.query(start_date="2024-03-03").empty
+    # 화면에 보이는 시각은 KST 입니다.
+    assert archive.query(limit=1)["ts"][0].hour == 0
+
+
+def test_compaction_keeps_newest_first_order(store, monkeypatch):
+    monkeypatch.setattr(archive, "COMPACT_MIN_PARTS", 3)
+    figures = _write_fragments([2, 2, 2, 2])
+    # 세 번째 파일에서 하나로 합쳐지고, 네 번째 파일이 새로 붙습니다.
+    assert len(_parts(store)) == 2
+    assert list(archive.query(limit=100)["figure"]) == figures[::-1]
+    assert list(archive.query(offset=3, limit=3)["figure"]) == figures[::-1][3:6]
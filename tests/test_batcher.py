@@ -0,0 +1,99 @@
+"""MicroBatcher 의 묶음 프롬프트 길이 제한과 응답 자르기 테스트"""
+import threading
+
+import pytest
+
+from common import batcher as batcher_module
+from common.batcher import MicroBatcher
+from common.model_router import LONG_CONTEXT_CHARS
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeRouter:
+    """보낸 프롬프트를 기록하고, 묶음 프롬프트에는 인물별 구역으로 답하는 가짜 라우터"""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, task="classify"):
+        with self.lock:
+            self.prompts.append(prompt)
+        count = prompt.count("### 인물 ")
+        if count:
+            return _Response("\n".join(f"===== 인물 {i}: x =====\n결론: {i}" for i in range(1, count + 1)))
+        return _Response("결론: 단독")
+
+
+def _batcher(monkeypatch):
+    fake = FakeRouter()
+    monkeypatch.setattr(batcher_module, "router", fake)
+    b = MicroBatcher(role="역할 설명 " * 20, rules="출력 규칙 " * 40, validate=lambda text: "결론" in text)
+    # 방금 다른 요청이 있었던 것처럼 만들어 요청을 모아 보내게 합니다.
+    b._last_arrival = batcher_module.time.monotonic()
+    return b, fake
+
+
+def test_packed_prompt_stays_under_long_context_limit(monkeypatch):
+    b, fake = _batcher(monkeypatch)
+    sections = ["사" * 2600 for _ in range(3)]
+    results = [None] * 3
+
+    def ask(i):
+        results[i] = b.generate(f"인물{i}", sections[i], f"단독 프롬프트 {sections[i]}")
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(r and "결론" in r for r in results)
+    assert all(len(p) <= LONG_CONTEXT_CHARS for p in fake.prompts if "### 인물 " in p)
+
+
+def test_split_answers_by_figure_number():
+    text = "머리말\n===== 인물 1: 김옥균 =====\n결론: 개화파\n===== 인물 2: 최익현 =====\n결론: 위정척사파"
+    assert MicroBatcher._split(text) == {1: "결론: 개화파", 2: "결론: 위정척사파"}
+
+
+class FailingRouter(FakeRouter):
+    """모든 모델이 실패하는 장애 상황의 라우터"""
+
+    def generate_content(self, prompt, task="classify"):
+        with self.lock:
+            self.prompts.append(prompt)
+        raise RuntimeError("429 Resource exhausted")
+
+
+def test_failed_packed_call_is_not_retried_per_figure(monkeypatch):
+    fake = FailingRouter()
+    monkeypatch.setattr(batcher_module, "router", fake)
+    b = MicroBatcher(role="역할", rules="규칙", validate=lambda text: "결론" in text)
+    requests = [batcher_module._Request(f"인물{i}", "자료", "단독 프롬프트") for i in range(3)]
+
+    b._send(requests)
+
+    for request in requests:
+        with pytest.raises(RuntimeError):
+            request.future.result()
+    # 묶음 호출 한 번만 나가고, 인물별 개별 호출은 하지 않습니다.
+    assert len(fake.prompts) == 1
+
+
+def test_missing_section_falls_back_to_an_individual_call(monkeypatch):
+    fake = FakeRouter()
+    monkeypatch.setattr(batcher_module, "router", fake)
+    b = MicroBatcher(role="역할", rules="규칙", validate=lambda text: "결론" in text)
+    monkeypatch.setattr(MicroBatcher, "_split", staticmethod(lambda text: {1: "결론: 1"}))
+    requests = [batcher_module._Request(f"인물{i}", "자료", "단독 프롬프트") for i in range(2)]
+
+    b._send(requests)
+
+    assert requests[0].future.result() == "결론: 1"
+    # 구역을 찾지 못한 요청은 None 을 받아 generate() 에서 개별 호출로 다시 요청합니다.
+    assert requests[1].future.result() is None
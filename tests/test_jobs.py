@@ -0,0 +1,108 @@
+"""JobRunner 의 완료 콜백 테스트 (결과 화면을 그리지 않아도 작업이 끝나면 기록되는지)"""
+import threading
+
+from common.jobs import JobRunner, analysis_failed
+
+
+class Recorder:
+    """콜백 호출을 기록하고, 기대한 횟수만큼 호출되면 알려 주는 도우미"""
+
+    def __init__(self, expected):
+        self.calls = []
+        self.expected = expected
+        self.lock = threading.Lock()
+        self.all_called = threading.Event()
+
+    def callback(self, who):
+        def on_done(result, latency_ms):
+            with self.lock:
+                self.calls.append((who, result, latency_ms))
+                if len(self.calls) >= self.expected:
+                    self.all_called.set()
+        return on_done
+
+
+def test_on_done_runs_when_job_finishes_without_polling():
+    runner = JobRunner(max_workers=1)
+    recorder = Recorder(expected=1)
+
+    runner.submit("k", lambda x: x * 2, 21, on_done=recorder.callback("A"))
+    # 아무도 작업 상태를 확인하지 않아도 콜백이 호출됩니다.
+    assert recorder.all_called.wait(2)
+    who, result, latency_ms = recorder.calls[0]
+    assert (who, result) == ("A", 42)
+    assert latency_ms >= 0
+
+
+def test_each_deduplicated_submitter_gets_its_own_callback():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    recorder = Recorder(expected=2)
+
+    def slow(x):
+        release.wait(2)
+        return x
+
+    first = runner.submit("k", slow, "결과", on_done=recorder.callback("A"))
+    second = runner.submit("k", slow, "결과", on_done=recorder.callback("B"))
+    assert first == second
+    release.set()
+    assert recorder.all_called.wait(2)
+    assert sorted((who, result) for who, result, _ in recorder.calls) == [("A", "결과"), ("B", "결과")]
+
+
+def test_failed_callback_does_not_block_others_or_the_job():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    recorder = Recorder(expected=1)
+
+    def broken_callback(result, latency_ms):
+        raise ValueError("기록 실패")
+
+    def slow():
+        release.wait(2)
+        return "결과"
+
+    job_id = runner.submit("k", slow, on_done=broken_callback)
+    runner.submit("k", slow, on_done=recorder.callback("B"))
+    release.set()
+    assert recorder.all_called.wait(2)
+    assert runner.get(job_id).status == "done"
+
+
+def test_on_done_is_skipped_for_failed_jobs():
+    runner = JobRunner(max_workers=1)
+    recorder = Recorder(expected=1)
+
+    def boom():
+        raise RuntimeError("실패")
+
+    job_id = runner.submit("fail", boom, on_done=recorder.callback("A"))
+    # 뒤에 맡긴 작업의 콜백이 불리면 앞의 실패한 작업은 이미 끝난 상태입니다. (작업 스레드 1개)
+    runner.submit("ok", lambda: "결과", on_done=recorder.callback("B"))
+    assert recorder.all_called.wait(2)
+    assert runner.get(job_id).status == "error"
+    assert [who for who, _, _ in recorder.calls] == ["B"]
+
+
+def test_wait_returns_as_soon_as_an_instant_job_finishes():
+    runner = JobRunner(max_workers=1)
+    job_id = runner.submit("k", lambda: "캐시된 결과")
+    job = runner.wait(job_id, 2)
+    assert job.done and job.result == "캐시된 결과"
+
+
+def test_wait_gives_up_after_timeout_for_slow_jobs():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    job_id = runner.submit("k", release.wait, 2)
+    assert not runner.wait(job_id, 0.05).done
+    release.set()
+    assert runner.wait(job_id, 2).done
+
+
+def test_failed_analysis_strings_are_recognised():
+    assert analysis_failed("최종 분류: 오류\n429 Resource exhausted")
+    assert analysis_failed("결론: 오류\n분석 중 오류 발생: timeout")
+    assert analysis_failed("분석 중 오류 발생: timeout")
+    assert not analysis_failed("결론: 개화파\n오류를 바로잡으려 한 개혁")
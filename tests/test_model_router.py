@@ -0,0 +1,146 @@
+"""ModelRouter 의 모델 순서(cascade), 실패 시 다음 모델로 넘기기, 대기(cooldown) 테스트"""
+import pytest
+
+from common import model_router as mr
+
+LITE, FLASH_LITE, FLASH = mr.TIERS
+
+
+class FakeClock:
+    """model_router 모듈이 보는 time.monotonic/perf_counter 를 직접 움직일 수 있는 가짜 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeModels:
+    """모델 이름별로 응답 시간과 실패 여부를 정해 두는 가짜 genai.GenerativeModel"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.latency = {name: 1.0 for name in mr.TIERS}
+        self.failing = set()
+        self.calls = []
+
+    def __call__(self, name):
+        models = self
+
+        class Model:
+            def generate_content(self, prompt):
+                models.calls.append(name)
+                models.clock.now += models.latency[name]
+                if name in models.failing:
+                    raise RuntimeError(f"{name} 실패")
+                return FakeResponse(f"{name} 응답")
+
+        return Model()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(mr, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def models(monkeypatch, clock):
+    fake = FakeModels(clock)
+    monkeypatch.setattr(mr.genai, "GenerativeModel", fake)
+    return fake
+
+
+def _fail_until_cooldown(router, models, name):
+    models.failing.add(name)
+    for _ in range(mr.MIN_SAMPLES):
+        router._record(name, False, 0.1)
+
+
+def test_cascade_starts_at_the_task_tier_and_falls_back_to_faster_tiers(clock):
+    router = mr.ModelRouter()
+    assert router.cascade("classify", "짧은 글") == [FLASH_LITE, LITE]
+    assert router.cascade("classify_fine", "짧은 글") == [FLASH, FLASH_LITE, LITE]
+    # 긴 프롬프트는 한 등급 위에서 시작하고, 가장 높은 등급을 넘지는 않습니다.
+    long_prompt = "가" * (mr.LONG_CONTEXT_CHARS + 1)
+    assert router.cascade("classify", long_prompt) == [FLASH, FLASH_LITE, LITE]
+    assert router.cascade("classify_fine", long_prompt) == [FLASH, FLASH_LITE, LITE]
+    assert router.cascade("모르는 작업", "짧은 글") == [LITE]
+
+
+def test_failed_model_falls_through_to_the_next_tier(models):
+    router = mr.ModelRouter()
+    models.failing.add(FLASH_LITE)
+    assert router.generate_content("질문").text == f"{LITE} 응답"
+    assert models.calls == [FLASH_LITE, LITE]
+    stats = {row["모델"]: row for row in router.stats()}
+    assert (stats[FLASH_LITE]["호출 수"], stats[FLASH_LITE]["오류 수"]) == (1, 1)
+    assert (stats[LITE]["호출 수"], stats[LITE]["오류 수"]) == (1, 0)
+
+
+def test_last_error_is_raised_when_every_model_fails(models):
+    router = mr.ModelRouter()
+    models.failing.update(mr.TIERS)
+    with pytest.raises(RuntimeError, match=f"{LITE} 실패"):
+        router.generate_content("질문")
+    assert models.calls == [FLASH_LITE, LITE]
+
+
+def test_erroring_model_cools_down_and_is_tried_last(models, clock):
+    router = mr.ModelRouter()
+    _fail_until_cooldown(router, models, FLASH_LITE)
+    assert router.cascade("classify", "질문") == [LITE, FLASH_LITE]
+    assert router.generate_content("질문").text == f"{LITE} 응답"
+    assert models.calls == [LITE]
+
+    # 다른 모델이 모두 실패하면 대기 중인 모델도 시도합니다.
+    models.failing.add(LITE)
+    models.calls.clear()
+    with pytest.raises(RuntimeError):
+        router.generate_content("질문")
+    assert models.calls == [LITE, FLASH_LITE]
+
+
+def test_cooled_model_is_retried_after_the_cooldown(models, clock):
+    router = mr.ModelRouter()
+    _fail_until_cooldown(router, models, FLASH_LITE)
+    clock.now += mr.COOLDOWN_SECONDS + 1
+    assert router.cascade("classify", "질문") == [FLASH_LITE, LITE]
+
+    # 다시 시험한 호출이 성공하고 빠르면 지난 오류 기록이 남아 있어도 계속 씁니다.
+    models.failing.clear()
+    models.calls.clear()
+    for _ in range(3):
+        router.generate_content("질문")
+    assert models.calls == [FLASH_LITE] * 3
+    assert router.cascade("classify", "질문")[0] == FLASH_LITE
+
+
+def test_consistently_slow_model_cools_down(models):
+    router = mr.ModelRouter()
+    models.latency[FLASH_LITE] = mr.SLOW_LATENCY_S[FLASH_LITE] + 1
+    for _ in range(mr.MIN_SAMPLES - 1):
+        router.generate_content("질문")
+    assert router.cascade("classify", "질문")[0] == FLASH_LITE
+    router.generate_content("질문")
+    assert router.cascade("classify", "질문") == [LITE, FLASH_LITE]
+    assert {row["모델"]: row["상태"] for row in router.stats()}[FLASH_LITE] == "대기(건너뜀)"
+
+
+def test_reset_stats_clears_cooldown(models):
+    router = mr.ModelRouter()
+    _fail_until_cooldown(router, models, FLASH_LITE)
+    router.reset_stats()
+    assert router.cascade("classify", "질문") == [FLASH_LITE, LITE]
+    assert all(row["호출 수"] == 0 for row in router.stats())
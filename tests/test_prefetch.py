@@ -0,0 +1,127 @@
+"""Prefetcher 의 입력 대기(debounce), 취소, 작업 수 제한, 최근 기록 건너뛰기 테스트"""
+import threading
+import time
+
+import pytest
+
+from common import prefetch
+from common.prefetch import Prefetcher, looks_like_name
+
+DEBOUNCE = 0.05
+
+
+@pytest.fixture(autouse=True)
+def short_debounce(monkeypatch):
+    monkeypatch.setattr(prefetch, "DEBOUNCE_SECONDS", DEBOUNCE)
+
+
+class Calls:
+    """미리 가져오기 함수 호출을 기록하고, 필요하면 release 될 때까지 붙잡아 두는 도우미"""
+
+    def __init__(self, block=False):
+        self.names = []
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def fetch(self, name):
+        with self.lock:
+            self.names.append(name)
+        self.started.set()
+        self.release.wait(2)
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _idle(prefetcher):
+    return not prefetcher._timers and not prefetcher._inflight
+
+
+def test_only_the_last_name_typed_within_the_debounce_is_fetched():
+    prefetcher = Prefetcher()
+    calls = Calls()
+    for name in ("김", "김옥", "김옥균"):
+        prefetcher.schedule("세션", ("p", name), calls.fetch, name)
+    assert _wait_until(lambda: calls.names and _idle(prefetcher))
+    time.sleep(DEBOUNCE * 3)
+    assert calls.names == ["김옥균"]
+
+
+def test_cancel_before_the_debounce_skips_the_fetch():
+    prefetcher = Prefetcher()
+    calls = Calls()
+    prefetcher.schedule("세션", ("p", "김옥균"), calls.fetch, "김옥균")
+    prefetcher.cancel("세션")
+    time.sleep(DEBOUNCE * 4)
+    assert calls.names == []
+    assert _idle(prefetcher)
+
+
+def test_cancel_drops_a_queued_job_that_has_not_started():
+    prefetcher = Prefetcher(max_workers=1)
+    busy = Calls(block=True)
+    queued = Calls()
+    prefetcher.schedule("A", ("p", "김옥균"), busy.fetch, "김옥균")
+    assert busy.started.wait(2)
+    prefetcher.schedule("B", ("p", "최익현"), queued.fetch, "최익현")
+    assert _wait_until(lambda: "B" in prefetcher._futures)
+
+    prefetcher.cancel("B")
+    busy.release.set()
+    # 취소된 작업도 inflight 목록에서 빠집니다.
+    assert _wait_until(lambda: _idle(prefetcher))
+    assert queued.names == []
+
+
+def test_jobs_over_the_pending_cap_are_skipped():
+    prefetcher = Prefetcher(max_workers=1, max_pending=2)
+    calls = Calls(block=True)
+    names = ["김옥균", "최익현", "박영효", "이항로", "김홍집"]
+    for i, name in enumerate(names):
+        prefetcher.schedule(f"세션{i}", ("p", name), calls.fetch, name)
+    assert _wait_until(lambda: not prefetcher._timers)
+    assert len(prefetcher._inflight) == 2
+
+    calls.release.set()
+    assert _wait_until(lambda: _idle(prefetcher))
+    assert len(calls.names) == 2
+
+
+def test_recently_fetched_name_is_not_fetched_again():
+    prefetcher = Prefetcher()
+    calls = Calls()
+    prefetcher.schedule("A", ("p", "김옥균"), calls.fetch, "김옥균")
+    assert _wait_until(lambda: calls.names and _idle(prefetcher))
+    # 다른 세션이 같은 이름을 입력해도 다시 가져오지 않습니다.
+    prefetcher.schedule("B", ("p", "김옥균"), calls.fetch, "김옥균")
+    assert _wait_until(lambda: _idle(prefetcher))
+    time.sleep(DEBOUNCE * 2)
+    assert calls.names == ["김옥균"]
+
+
+def test_failed_fetch_does_not_leak_inflight_keys():
+    prefetcher = Prefetcher()
+    attempted = threading.Event()
+
+    def broken(name):
+        attempted.set()
+        raise ConnectionError("요청 실패")
+
+    prefetcher.schedule("A", ("p", "김옥균"), broken, "김옥균")
+    assert attempted.wait(2)
+    assert _wait_until(lambda: _idle(prefetcher))
+
+
+def test_partial_input_does_not_look_like_a_name():
+    assert looks_like_name("김옥균")
+    assert looks_like_name("칭기즈 칸")
+    assert not looks_like_name("김")
+    assert not looks_like_name("ㄱㅇㄱ")
+    assert not looks_like_name("")
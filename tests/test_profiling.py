@@ -0,0 +1,143 @@
+"""profiling 의 cProfile 충돌 처리, 끝난 스레드 정리, 분석 작업 기록, 운영자 제한 테스트"""
+import os
+import threading
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from common import profiling
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "is_enabled", lambda: True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "_active", {})
+    return tmp_path
+
+
+class BusyProfile:
+    """Python 3.12 처럼 다른 프로파일링 도구가 이미 켜져 있을 때의 cProfile"""
+
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+    def disable(self):
+        pass
+
+
+def _in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+def test_begin_falls_back_to_sampling_when_cprofile_is_busy(enabled, monkeypatch):
+    monkeypatch.setattr(profiling.cProfile, "Profile", BusyProfile)
+
+    def page():
+        profiling.begin("p")  # 예외가 페이지로 올라오면 안 됩니다.
+        profiling.end()
+
+    _in_thread(page)
+    (run,) = profiling.list_runs()
+    assert "샘플링만" in run["summary"]
+    assert profiling.run_file(run["id"], ".prof") is None
+    assert profiling.run_file(run["id"], ".folded") is not None
+
+
+def test_only_one_cprofile_at_a_time_when_exclusive(monkeypatch):
+    monkeypatch.setattr(profiling, "_CPROFILE_EXCLUSIVE", True)
+    first = profiling._Run("a", __file__)
+    second = profiling._Run("b", __file__)
+    first.start()
+    try:
+        second.start()
+        assert first.profiler is not None
+        assert second.profiler is None
+    finally:
+        second.stop()
+        first.stop()
+    # 앞의 실행이 끝나면 다음 실행이 다시 cProfile 을 씁니다.
+    third = profiling._Run("c", __file__)
+    third.start()
+    assert third.profiler is not None
+    third.stop()
+
+
+def test_runs_of_finished_threads_are_pruned(enabled):
+    _in_thread(lambda: profiling.begin("중단된 실행"))  # end() 없이 스레드가 끝남
+    assert len(profiling._active) == 1
+
+    _in_thread(lambda: (profiling.begin("다음 실행"), profiling.end()))
+    assert profiling._active == {}
+
+
+def test_job_submitted_while_profiling_is_recorded_with_parent(enabled):
+    wrapped = {}
+
+    def page():
+        profiling.begin("p")
+        wrapped["fn"] = profiling.wrap_job(lambda x: x + 1)
+        wrapped["parent"] = profiling._active[threading.get_ident()].id
+        profiling.end()
+
+    _in_thread(page)
+    result = {}
+    _in_thread(lambda: result.setdefault("value", wrapped["fn"](1)))
+    assert result["value"] == 2
+
+    job_runs = [r for r in profiling.list_runs() if r["parent"]]
+    assert len(job_runs) == 1
+    assert job_runs[0]["parent"] == wrapped["parent"]
+    assert job_runs[0]["id"].startswith(wrapped["parent"] + "-job-")
+
+
+def test_wrap_job_is_a_no_op_without_an_active_run(enabled):
+    fn = lambda: None  # noqa: E731
+    assert profiling.wrap_job(fn) is fn
+
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "실행_프로파일_기록.py")
+
+
+def _profile_switch_page():
+    import streamlit as st
+
+    from common import profiling
+
+    st.text(f"operator={profiling.is_operator()} enabled={profiling.is_enabled()}")
+
+
+def _open(app, admin=None, profile=None):
+    app.secrets[profiling.ADMIN_TOKEN_SECRET] = "비밀"
+    if admin is not None:
+        app.query_params["admin"] = admin
+    if profile is not None:
+        app.query_params["profile"] = profile
+    return app.run()
+
+
+@pytest.mark.parametrize("admin", [None, "틀린 토큰"])
+def test_profile_page_is_closed_to_non_operators(admin, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    at = _open(AppTest.from_file(PAGE), admin=admin)
+    assert "운영자만" in at.error[0].value
+    assert not at.dataframe and not at.button
+
+
+def test_profile_page_opens_with_the_admin_token(monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    at = _open(AppTest.from_file(PAGE), admin="비밀")
+    assert not at.error
+
+
+@pytest.mark.parametrize("admin, expected", [
+    (None, "operator=False enabled=False"),
+    ("틀린 토큰", "operator=False enabled=False"),
+    ("비밀", "operator=True enabled=True"),
+])
+def test_profile_query_param_is_honoured_only_for_operators(admin, expected, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    at = _open(AppTest.from_function(_profile_switch_page), admin=admin, profile="1")
+    assert at.text[0].value == expected
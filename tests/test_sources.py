@@ -0,0 +1,25 @@
+"""sources.make_source 의 digest 와 '결과 없음' 표시 테스트"""
+from common.sources import NO_SOURCE, Source, make_source
+
+
+def test_same_text_gets_the_same_short_digest():
+    first = make_source("안중근은 하얼빈에서 이토 히로부미를 저격하였다.")
+    second = make_source("안중근은 하얼빈에서 이토 히로부미를 저격하였다.")
+    assert isinstance(first, Source)
+    assert first == second
+    assert first.text == "안중근은 하얼빈에서 이토 히로부미를 저격하였다."
+    assert len(first.digest) == 32  # 16바이트 blake2b 의 16진수 표기
+
+
+def test_different_text_gets_a_different_digest():
+    # 본문이 조금만 바뀌어도 분석 캐시 키가 달라져야 합니다.
+    assert make_source("본문 가").digest != make_source("본문 나").digest
+    assert make_source("본문").digest != make_source("본문 ").digest
+
+
+def test_empty_text_is_no_source():
+    assert make_source("") is NO_SOURCE
+    assert make_source(None) is NO_SOURCE
+    assert NO_SOURCE.text is None and NO_SOURCE.digest is None
+    # NO_SOURCE 는 실패(None)와 구분되는 참 값입니다.
+    assert NO_SOURCE is not None and NO_SOURCE
@@ -0,0 +1,196 @@
+"""swr_cache 의 만료(soft/hard), 키별 단일 갱신, validate 거부 동작 테스트"""
+import threading
+import time
+
+import pytest
+
+from common import swr_cache as swr
+from common.sources import NO_SOURCE, make_source
+
+
+class FakeClock:
+    """swr_cache 모듈이 보는 time.monotonic 을 직접 움직일 수 있는 가짜 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(swr, "time", fake)
+    return fake
+
+
+def _wait_refresh_done(is_refreshing, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while is_refreshing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _store_of(wrapper):
+    # wrapper.clear 는 저장소의 bound method 이므로 저장소를 꺼낼 수 있습니다.
+    return wrapper.clear.__self__
+
+
+def test_fresh_value_is_served_from_cache(clock):
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100)
+    def fetch(name):
+        calls.append(name)
+        return f"{name}-{len(calls)}"
+
+    fetch.clear()
+    assert fetch("a") == "a-1"
+    clock.now += 9
+    assert fetch("a") == "a-1"
+    assert calls == ["a"]
+
+
+def test_soft_expiry_serves_stale_value_and_refreshes_in_background(clock):
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100)
+    def fetch(name):
+        calls.append(name)
+        return f"{name}-{len(calls)}"
+
+    fetch.clear()
+    store = _store_of(fetch)
+    assert fetch("a") == "a-1"
+    clock.now += 11
+    # 오래된 값을 바로 돌려주고, 갱신은 백그라운드에서 일어납니다.
+    assert fetch("a") == "a-1"
+    _wait_refresh_done(lambda: store.refreshing)
+    assert calls == ["a", "a"]
+    assert fetch("a") == "a-2"
+
+
+def test_hard_expiry_recomputes_in_place(clock):
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100)
+    def fetch(name):
+        calls.append(name)
+        return f"{name}-{len(calls)}"
+
+    fetch.clear()
+    assert fetch("a") == "a-1"
+    clock.now += 101
+    assert fetch("a") == "a-2"
+    assert calls == ["a", "a"]
+
+
+def test_only_one_background_refresh_per_key(clock):
+    release = threading.Event()
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100)
+    def fetch(name):
+        calls.append(name)
+        if len(calls) > 1:
+            release.wait(2)
+        return f"{name}-{len(calls)}"
+
+    fetch.clear()
+    store = _store_of(fetch)
+    fetch("a")
+    clock.now += 11
+    # 갱신이 끝나기 전까지 여러 번 요청해도 갱신은 한 번만 시작됩니다.
+    results = [fetch("a") for _ in range(5)]
+    assert results == ["a-1"] * 5
+    release.set()
+    _wait_refresh_done(lambda: store.refreshing)
+    assert calls == ["a", "a"]
+
+
+def test_refresh_rejected_by_validate_keeps_old_value(clock):
+    answers = iter(["ok", "결론: 오류"])
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100, validate=lambda text: "오류" not in text)
+    def analyze(name):
+        return next(answers)
+
+    analyze.clear()
+    store = _store_of(analyze)
+    assert analyze("a") == "ok"
+    clock.now += 11
+    assert analyze("a") == "ok"
+    _wait_refresh_done(lambda: store.refreshing)
+    assert analyze("a") == "ok"
+
+
+def test_miss_rejected_by_validate_is_kept_only_for_negative_ttl(clock):
+    answers = iter([None, "본문"])
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100, negative_ttl=5)
+    def fetch(url):
+        calls.append(url)
+        return next(answers)
+
+    fetch.clear()
+    # 실패(None)는 negative_ttl 동안만 그대로 돌려주고, 그 뒤에 다시 가져옵니다.
+    assert fetch("u") is None
+    clock.now += 4
+    assert fetch("u") is None
+    assert calls == ["u"]
+    clock.now += 2
+    assert fetch("u") == "본문"
+    clock.now += 50
+    assert fetch("u") == "본문"
+    assert calls == ["u", "u"]
+
+
+def test_exception_is_not_stored(clock):
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100)
+    def fetch(url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise ConnectionError("요청 실패")
+        return "본문"
+
+    fetch.clear()
+    with pytest.raises(ConnectionError):
+        fetch("u")
+    assert fetch("u") == "본문"
+    assert calls == ["u", "u"]
+
+
+def test_no_results_sentinel_is_cached_like_a_normal_value(clock):
+    calls = []
+
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100, negative_ttl=5)
+    def scrape(name):
+        calls.append(name)
+        return make_source("")  # 검색은 됐지만 결과 없음
+
+    scrape.clear()
+    for _ in range(5):
+        assert scrape("없는 인물") is NO_SOURCE
+        clock.now += 1.5
+    assert calls == ["없는 인물"]
+
+
+def test_key_locks_do_not_outlive_their_entries(clock):
+    @swr.swr_cache(soft_ttl=10, hard_ttl=100, max_entries=10)
+    def fetch(name):
+        if name.startswith("오류"):
+            raise ConnectionError("요청 실패")
+        return None  # 검증을 통과하지 못한 결과
+
+    fetch.clear()
+    store = _store_of(fetch)
+    for i in range(1000):
+        fetch(f"오타{i}")
+        with pytest.raises(ConnectionError):
+            fetch(f"오류{i}")
+    # 잠금은 저장된 항목 수(max_entries) 이상으로 쌓이지 않습니다.
+    assert len(store.entries) == 10
+    assert len(store.key_locks) <= 10